@@ -0,0 +1,81 @@
+#
+# bench_log_throughput.py -- log lines per second with a fresh timestamp per line vs the cached timestamp.
+#
+# run on CPython from this directory: python bench_log_throughput.py
+# run on the Pico-W: copy this file to the board next to micro_logging.py and utils.py, then
+#   mpremote run bench_log_throughput.py
+#
+# printing is turned off so the numbers are the cost of building the line and storing it in the ring,
+# not of the USB serial port.
+#
+
+import gc
+import sys
+import time
+
+sys.path.append('../src/rotator')
+
+import micro_logging as logging
+import utils
+
+ITERATIONS = 2000
+
+if hasattr(time, 'ticks_us'):
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+else:
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+
+def old_get_timestamp():
+    # the timestamp as it was built before, for every log line.
+    tt = time.gmtime()
+    return f'{tt[0]:04d}-{tt[1]:02d}-{tt[2]:02d} {tt[3]:02d}:{tt[4]:02d}:{tt[5]:02d}Z'
+
+
+def mem_alloc():
+    # heap allocation is only measurable on micropython.
+    return gc.mem_alloc() if hasattr(gc, 'mem_alloc') else None
+
+
+def run(name, func):
+    gc.collect()
+    gc.disable()
+    m0 = mem_alloc()
+    t0 = ticks_us()
+    for i in range(ITERATIONS):
+        func(i)
+    elapsed = ticks_diff(ticks_us(), t0)
+    m1 = mem_alloc()
+    gc.enable()
+    if m0 is None:
+        print(f'{name:<30s} {elapsed / ITERATIONS:8.2f} us {ITERATIONS * 1000000 // elapsed:8d} /s')
+    else:
+        print(f'{name:<30s} {elapsed / ITERATIONS:8.2f} us {ITERATIONS * 1000000 // elapsed:8d} /s'
+              f'  {(m1 - m0) / ITERATIONS:8.1f} bytes')
+
+
+def log_line(i):
+    logging.info('%s %s %d %d ms', 'http_server:serve_http_client', '192.168.1.10', 'GET /api/bearing', 200, i)
+
+
+def main():
+    logging.loglevel = logging.INFO
+    logging.set_print(False)
+    print(f'{sys.implementation.name}, {ITERATIONS} iterations, print off')
+    run('timestamp gmtime per call', lambda i: old_get_timestamp())
+    run('timestamp cached', lambda i: utils.get_timestamp())
+    run('timestamp cached with ms', lambda i: utils.get_timestamp_ms())
+    new_timestamp = logging.get_timestamp_ms
+    logging.get_timestamp_ms = old_get_timestamp
+    run('info() gmtime per line', log_line)
+    logging.get_timestamp_ms = new_timestamp
+    run('info() cached with ms', log_line)
+    logging.set_print(True)
+
+
+main()
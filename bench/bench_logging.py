@@ -0,0 +1,157 @@
+#
+# bench_logging.py -- heap cost of log calls, filtered out and emitted, per call and per N1MM datagram.
+#
+# run on CPython from this directory: python bench_logging.py
+# run on the Pico-W: copy this file to the board next to the rotator modules, then
+#   mpremote run bench_logging.py
+#
+# on MicroPython the cost is the bytes allocated (gc.mem_alloc with the collector off).  CPython frees
+# short-lived objects at once, so there it is the transient heap high-water mark of each call or
+# datagram, from tracemalloc, summed.  only the MicroPython figures say what the Pico-W allocates.
+#
+# each call is measured the old way, with an f-string built by the caller, and the new way, with the
+# format and its arguments passed through.  emitted calls go to the in-memory log with printing off.
+#
+
+import asyncio
+import gc
+import sys
+import time
+
+sys.path.append('../src/rotator')
+
+import micro_logging as logging
+import n1mm_udp
+
+ITERATIONS = 1000
+DATAGRAM = (b'<N1MMRotor><rotor>rotor-50</rotor><goazi>66.0</goazi><offset>0.0</offset>'
+            b'<bidirectional>0</bidirectional><freqband>28.0</freqband></N1MMRotor>')
+
+if hasattr(time, 'ticks_us'):
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+else:
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+if hasattr(gc, 'mem_alloc'):
+    tracemalloc = None
+    UNIT = 'bytes'
+else:
+    import tracemalloc
+    UNIT = 'peak bytes'
+
+
+class Meter:
+    """
+    measures heap use between start() and stop().  on CPython, call mark() after each call or datagram.
+    """
+
+    def start(self):
+        gc.collect()
+        self.used = 0
+        if tracemalloc is None:
+            gc.disable()
+            self.m0 = gc.mem_alloc()
+        else:
+            tracemalloc.start()
+            self.m0 = tracemalloc.get_traced_memory()[0]
+        self.t0 = ticks_us()
+
+    def mark(self):
+        if tracemalloc is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            self.used += peak - self.m0
+            tracemalloc.reset_peak()
+            self.m0 = current
+
+    def stop(self):
+        elapsed = ticks_diff(ticks_us(), self.t0)
+        if tracemalloc is None:
+            self.used = gc.mem_alloc() - self.m0
+            gc.enable()
+        else:
+            self.mark()
+            tracemalloc.stop()
+        return elapsed, self.used
+
+
+class FakeRotator:
+    name = 'rotor-50'
+
+    @staticmethod
+    def plan_bearing(goazi, offset=0, bidirectional=False):
+        return goazi
+
+    @staticmethod
+    async def set_rotator_bearing(bearing):
+        return -13  # busy, so the result gets logged (and filtered out)
+
+
+class BenchReceiver(n1mm_udp.ReceiveBroadcastsFromN1MM):
+    # feeds the same datagram ITERATIONS times, in batches of two so the batch log line runs too.
+
+    def __init__(self, meter):
+        super().__init__('127.0.0.1', 0, rotators=[FakeRotator()])
+        self.meter = meter
+        self.remaining = ITERATIONS
+
+    async def receive_into(self, buffer):
+        await asyncio.sleep(0)  # like a real receive, this lets the set_bearing tasks run.
+        return self.receive_pending_into(buffer)
+
+    def receive_pending_into(self, buffer):
+        self.meter.mark()
+        if self.remaining == 0:
+            self.run = False
+            return 0
+        self.remaining -= 1
+        length = len(DATAGRAM)
+        buffer[:length] = DATAGRAM
+        return length if self.remaining % 2 else 0
+
+
+def run_calls(name, func):
+    meter = Meter()
+    meter.start()
+    for i in range(ITERATIONS):
+        func(i)
+        meter.mark()
+    elapsed, used = meter.stop()
+    print(f'{name:<34s} {elapsed / ITERATIONS:8.2f} us {used / ITERATIONS:8.1f} {UNIT}')
+
+
+async def run_datagrams():
+    meter = Meter()
+    receiver = BenchReceiver(meter)
+    meter.start()
+    await receiver.wait_for_datagram()
+    await asyncio.sleep(0)  # let the set_bearing tasks finish
+    await asyncio.sleep(0)
+    elapsed, used = meter.stop()
+    receiver.close()
+    name = 'N1MM datagram, receive to command'
+    print(f'{name:<34s} {elapsed / ITERATIONS:8.2f} us {used / ITERATIONS:8.1f} {UNIT}')
+
+
+def run_before_and_after(level_name, log):
+    run_calls(f'{level_name}(f-string)', lambda i: log(f'{i} datagrams in batch, total coalesced {i}', 'bench'))
+    run_calls(f'{level_name}(format, args)', lambda i: log('%d datagrams in batch, total coalesced %d', 'bench', i, i))
+
+
+def main():
+    logging.loglevel = logging.ERROR  # the default, debug and info are filtered out
+    logging.set_print(False)
+    print(f'{sys.implementation.name}, {ITERATIONS} iterations, loglevel ERROR, print off, per call')
+    print('filtered out:')
+    run_before_and_after('debug', logging.debug)
+    print('emitted:')
+    run_before_and_after('error', logging.error)
+    asyncio.run(run_datagrams())
+    logging.set_print(True)
+
+
+main()
@@ -0,0 +1,82 @@
+#
+# bench_n1mm_parse.py -- compare N1MM rotor datagram parsing, str/float vs bytes/tenths.
+#
+# run on CPython from this directory: python bench_n1mm_parse.py
+# run on the Pico-W: copy this file to the board next to n1mm_udp.py, then
+#   mpremote run bench_n1mm_parse.py
+#
+
+import gc
+import sys
+import time
+
+sys.path.append('../src/rotator')
+
+from n1mm_udp import get_element, parse_rotor_datagram, RotorDatagram
+
+ITERATIONS = 2000
+DATAGRAM = (b'<N1MMRotor><rotor>rotor-50</rotor><goazi>66.0</goazi><offset>0.0</offset>'
+            b'<bidirectional>0</bidirectional><freqband>28.0</freqband></N1MMRotor>')
+MY_NAME = 'rotor-50'
+MY_NAME_BYTES = b'rotor-50'
+
+if hasattr(time, 'ticks_us'):
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+else:
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+
+def old_parse(udp_data):
+    message = udp_data.decode('utf-8')
+    rotor_name = get_element(message, 'rotor')
+    if rotor_name == MY_NAME:
+        goazi = get_element(message, 'goazi')
+        return int(float(goazi))
+    return None
+
+
+def new_parse(bmv, length, datagram):
+    if parse_rotor_datagram(bmv, length, datagram) and datagram.rotor_is(bmv, MY_NAME_BYTES):
+        return datagram.goazi // 10
+    return None
+
+
+def mem_alloc():
+    # heap allocation is only measurable on micropython.
+    return gc.mem_alloc() if hasattr(gc, 'mem_alloc') else None
+
+
+def run(name, func, *args):
+    gc.collect()
+    gc.disable()
+    m0 = mem_alloc()
+    t0 = ticks_us()
+    for _ in range(ITERATIONS):
+        func(*args)
+    elapsed = ticks_diff(ticks_us(), t0)
+    m1 = mem_alloc()
+    gc.enable()
+    if m0 is None:
+        print(f'{name:<22s} {elapsed / ITERATIONS:8.1f} us/datagram')
+    else:
+        print(f'{name:<22s} {elapsed / ITERATIONS:8.1f} us/datagram  {(m1 - m0) / ITERATIONS:8.1f} bytes/datagram')
+
+
+def main():
+    buffer = bytearray(512)
+    length = len(DATAGRAM)
+    buffer[:length] = DATAGRAM
+    bmv = memoryview(buffer)
+    datagram = RotorDatagram()
+    assert old_parse(DATAGRAM) == new_parse(bmv, length, datagram) == 66
+    print(f'{sys.implementation.name}, {ITERATIONS} iterations')
+    run('str + get_element', old_parse, DATAGRAM)
+    run('bytes one-pass', new_parse, bmv, length, datagram)
+
+
+main()
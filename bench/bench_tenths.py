@@ -0,0 +1,102 @@
+#
+# bench_tenths.py -- compare float bearing conversions with the integer tenths codecs.
+#
+# run on CPython from this directory: python bench_tenths.py
+# run on the Pico-W: copy this file to the board next to tenths.py and utils.py, then
+#   mpremote run bench_tenths.py
+#
+
+import gc
+import sys
+import time
+
+sys.path.append('../src/rotator')
+
+from tenths import format_tenths, parse_tenths, write_degrees
+
+ITERATIONS = 2000
+GOAZI = b'266.5'
+DCU1_RESPONSE = b';267'
+
+if hasattr(time, 'ticks_us'):
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+else:
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+
+def old_parse_goazi():
+    return int(float(GOAZI.decode()))
+
+
+def new_parse_goazi():
+    return parse_tenths(GOAZI)
+
+
+def old_parse_response():
+    return int(DCU1_RESPONSE.decode()[1:])
+
+
+def new_parse_response():
+    return parse_tenths(DCU1_RESPONSE, 1, len(DCU1_RESPONSE))
+
+
+def old_set_command():
+    return f'AP1{int(267.0):03n}\r'.encode('utf-8')
+
+
+def new_set_command(command=bytearray(b'AP1000\r')):
+    write_degrees(command, 3, 2670)
+    return command
+
+
+def old_http_response():
+    return f'{267}\r\n'.encode('utf-8')
+
+
+def new_http_response():
+    return format_tenths(2670) + b'\r\n'
+
+
+def mem_alloc():
+    # heap allocation is only measurable on micropython.
+    return gc.mem_alloc() if hasattr(gc, 'mem_alloc') else None
+
+
+def run(name, func):
+    gc.collect()
+    gc.disable()
+    m0 = mem_alloc()
+    t0 = ticks_us()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = ticks_diff(ticks_us(), t0)
+    m1 = mem_alloc()
+    gc.enable()
+    if m0 is None:
+        print(f'{name:<30s} {elapsed / ITERATIONS:8.2f} us')
+    else:
+        print(f'{name:<30s} {elapsed / ITERATIONS:8.2f} us  {(m1 - m0) / ITERATIONS:8.1f} bytes')
+
+
+def main():
+    assert new_parse_goazi() == 2665 and old_parse_goazi() == 266
+    assert new_parse_response() == old_parse_response() * 10
+    assert bytes(new_set_command()) == old_set_command()
+    assert new_http_response() == old_http_response()
+    print(f'{sys.implementation.name}, {ITERATIONS} iterations, per conversion')
+    run('goazi int(float())', old_parse_goazi)
+    run('goazi parse_tenths', new_parse_goazi)
+    run('DCU-1 response int()', old_parse_response)
+    run('DCU-1 response parse_tenths', new_parse_response)
+    run('AP1 command f-string', old_set_command)
+    run('AP1 command write_degrees', new_set_command)
+    run('HTTP response f-string', old_http_response)
+    run('HTTP response format_tenths', new_http_response)
+
+
+main()
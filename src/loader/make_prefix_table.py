@@ -0,0 +1,78 @@
+#!/bin/env python3
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+"""
+pack prefixes.csv into the binary table that locator.PrefixTable searches on the Pico-W.
+run from this directory: python make_prefix_table.py
+"""
+import argparse
+import struct
+import sys
+
+sys.path.append('../rotator')
+
+from locator import PREFIX_LENGTH, PREFIX_RECORD_FORMAT
+
+
+def read_prefixes(filename):
+    prefixes = {}
+    with open(filename, 'r') as csv_file:
+        for line_number, line in enumerate(csv_file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            prefix, latitude, longitude = [part.strip() for part in line.split(',')]
+            prefix = prefix.upper()
+            if len(prefix) > PREFIX_LENGTH:
+                raise ValueError(f'line {line_number}: prefix {prefix} is longer than {PREFIX_LENGTH}')
+            if prefix in prefixes:
+                raise ValueError(f'line {line_number}: duplicate prefix {prefix}')
+            prefixes[prefix] = (float(latitude), float(longitude))
+    return prefixes
+
+
+def pack_prefixes(prefixes):
+    # records are sorted by their space-padded prefix, the order the binary search expects.
+    data = bytearray()
+    for prefix in sorted(prefixes, key=lambda p: p.ljust(PREFIX_LENGTH)):
+        latitude, longitude = prefixes[prefix]
+        data += struct.pack(PREFIX_RECORD_FORMAT, prefix.ljust(PREFIX_LENGTH).encode('ascii'),
+                            round(latitude * 100), round(longitude * 100))
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='build the packed prefix table')
+    parser.add_argument('--input', default='prefixes.csv', help='prefix,latitude,longitude csv file')
+    parser.add_argument('--output', default='../rotator/prefixes.bin', help='packed table file')
+    args = parser.parse_args()
+    prefixes = read_prefixes(args.input)
+    data = pack_prefixes(prefixes)
+    with open(args.output, 'wb') as table_file:
+        table_file.write(data)
+    print(f'wrote {len(prefixes)} prefixes, {len(data)} bytes to {args.output}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#
+# config_store.py -- RAM-resident configuration with debounced write-back to flash.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import asyncio
+import json
+import os
+import micro_logging as logging
+from loop_monitor import set_activity
+from utils import set_profiling
+
+CONFIG_FILE = 'data/config.json'
+
+
+class ConfigStore:
+    """
+    holds the configuration in RAM.  the file is read once, GETs are served from the
+    cached serialized JSON, and changes are written back to flash after a quiet period.
+    writes go to a temporary file that is then renamed over the real file, so a power
+    failure mid-write leaves either the old or the new configuration, never half of one.
+    """
+
+    def __init__(self, filename, defaults=None, write_delay=2.0):
+        self._filename = filename
+        self._temp_filename = filename + '.tmp'
+        self._defaults = defaults or {}
+        self._write_delay = write_delay
+        self._config = None
+        self._json = None
+        self._dirty = False
+        self._generation = 0
+        self._write_task = None
+
+    def _read_file(self, filename):
+        with open(filename, 'r') as config_file:
+            return json.load(config_file)
+
+    def load(self) -> dict:
+        try:
+            self._config = self._read_file(self._filename)
+        except Exception as ex:
+            try:
+                # power may have failed after the temp file was written but before the rename.
+                self._config = self._read_file(self._temp_filename)
+                logging.warning('recovered configuration from temp file', 'config_store:load')
+                self._dirty = True
+            except Exception:
+                logging.exception('failed to load configuration, using default...',
+                                  'config_store:load', exc_info=ex)
+                self._config = dict(self._defaults)
+        self._json = None
+        return self._config
+
+    def get(self) -> dict:
+        """
+        get the configuration dict.  do not modify it, use update().
+        """
+        if self._config is None:
+            self.load()
+        return self._config
+
+    def get_json(self) -> bytes:
+        """
+        get the configuration serialized as JSON bytes, cached until the next update.
+        """
+        if self._json is None:
+            self._json = json.dumps(self.get()).encode('utf-8')
+        return self._json
+
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def update(self, changes: dict) -> bool:
+        """
+        apply changes to the configuration and schedule a write-back.
+        :param changes: dict of configuration items to set
+        :return: True if anything changed
+        """
+        config = self.get()
+        changed = False
+        for key, value in changes.items():
+            if config.get(key) != value or key not in config:
+                config[key] = value
+                changed = True
+        if changed:
+            self._json = None
+            self._dirty = True
+            self._generation += 1
+            if self._write_task is None:
+                try:
+                    self._write_task = asyncio.create_task(self._write_back())
+                except RuntimeError:
+                    # no event loop running, write it now.
+                    self.flush()
+        return changed
+
+    def flush(self) -> None:
+        """
+        write the configuration to flash now if it has changed.
+        """
+        if not self._dirty:
+            return
+        set_activity('config_store:flush')  # flash writes block the event loop.
+        data = self.get_json()
+        try:
+            with open(self._temp_filename, 'wb') as config_file:
+                config_file.write(data)
+            try:
+                os.rename(self._temp_filename, self._filename)
+            except OSError:
+                # some filesystems will not rename over an existing file.
+                os.remove(self._filename)
+                os.rename(self._temp_filename, self._filename)
+            self._dirty = False
+            logging.info('wrote %d bytes to %s', 'config_store:flush', len(data), self._filename)
+        except Exception as ex:
+            logging.exception('failed to save configuration', 'config_store:flush', exc_info=ex)
+
+    async def _write_back(self):
+        try:
+            while self._dirty:
+                generation = self._generation
+                await asyncio.sleep(self._write_delay)
+                if generation == self._generation:  # nothing changed while waiting
+                    self.flush()
+                    if self._dirty:  # write failed, do not spin on it.
+                        break
+        finally:
+            self._write_task = None
+
+
+# the controller's configuration, held in RAM and written back to flash after changes settle.
+# @profiled decides when a module is imported, so the 'profile' item is applied here, and main imports
+# this module before the modules it profiles.
+config_store = ConfigStore(CONFIG_FILE, defaults={
+    'SSID': 'set your SSID here',
+    'secret': 'secret',
+    'dhcp': True,
+    'ip_address': '192.168.1.73',
+    'netmask': '255.255.255.0',
+    'gateway': '192.168.1.1',
+    'dns_server': '8.8.8.8',
+    'hostname': 'rotator',
+    'n1mm': False,
+    'tcp_port': '73',
+    'web_port': '80',
+    'rotctld_port': '4533',
+})
+set_profiling(config_store.get().get('profile'))
@@ -33,27 +33,95 @@ __version__ = '0.9.0'
 from serialport import SerialPort
 import asyncio
 import micro_logging as logging
+from tenths import FULL_CIRCLE, TENTHS_PER_DEGREE, digits_end, parse_tenths, write_degrees
+from utils import milliseconds, milliseconds_diff, profiled_async
+
+ROTATION_SPEED = 60  # tenths of degrees per second, a Ham-IV turns 360 degrees in about a minute.
+
+
+def plan_rotation(current, goazi, offset=0, bidirectional=False, overlap=0):
+    """
+    choose the rotator position that reaches the requested heading in the least time.
+    all values are in tenths of degrees.
+
+    the rotator can travel from 0 to 360 + overlap, it cannot pass through the mechanical stop
+    at 0/360, so the travel is the straight-line distance between positions.  the travel time is
+    distance / ROTATION_SPEED, so the shortest travel is also the fastest.
+
+    :param current: current rotator position, or negative if unknown
+    :param goazi: requested antenna heading
+    :param offset: antenna heading minus rotator position, for antennas mounted askew
+    :param bidirectional: the antenna works equally well in the reciprocal direction
+    :param overlap: how far past 360 the rotator can travel, 0 if it has no overlap
+    :return: the rotator position to command
+    """
+    heading = (goazi - offset) % FULL_CIRCLE
+    if current < 0:
+        return heading
+    limit = FULL_CIRCLE + overlap
+    best = heading
+    best_travel = limit + 1
+    for candidate in (heading, (heading + FULL_CIRCLE // 2) % FULL_CIRCLE) if bidirectional else (heading,):
+        position = candidate
+        while position <= limit:
+            travel = position - current if position > current else current - position
+            if travel < best_travel:
+                best = position
+                best_travel = travel
+            position += FULL_CIRCLE
+    return best
+
+
+def travel_time(current, target):
+    """
+    :return: estimated seconds to rotate between two positions in tenths of degrees
+    """
+    travel = target - current if target > current else current - target
+    return travel / ROTATION_SPEED
 
 
 class Rotator:
+    """
+    talks DCU-1 to a rotator controller.  all bearings are int tenths of degrees, see tenths.py.
+    """
     BAUD_RATE = 4800
     ERROR_NO_DATA = -10
     ERROR_BAD_DATA = -11
     ERROR_ASYNC = -12
     ERROR_BUSY = -13
     ERROR_UNKNOWN = -99
+    BEARING_MAX_AGE_MS = 500  # cached bearings younger than this are served without a serial transaction.
+    POLL_INTERVAL = 0.5  # seconds between bearing polls while the rotator is moving.
+    POLL_INTERVAL_IDLE = 4.0  # polls back off to this while the bearing is not changing.
 
-    def __init__(self, primitive=False):
+    def __init__(self, primitive=False, name=None, port_name='', overlap=0):
         """
         set up rotator control class
         :param primitive: set this true if rotor control is not Rotor-EZ or Green Heron
+        :param name: the rotor name, used by N1MM and the web API to select this rotator
+        :param port_name: serial port, '0' or '1' for the Pico-W UARTs
+        :param overlap: degrees the rotator can travel past 360, 0 if it has no overlap
         """
+        self.name = name
+        self.overlap = overlap
         self.serial_port_locked = True
         self.primitive = primitive # set True to use two-command mode for NOT Rotor-EZ or Green Heron
         self.buffer = bytearray(16)
+        # set bearing commands are built in place, the digits start at index 3.
+        self.set_command = bytearray(b'AP1000;') if primitive else bytearray(b'AP1000\r')
         self.last_bearing = Rotator.ERROR_UNKNOWN
+        self.last_bearing_time = 0
+        self.bearing_changed = asyncio.Event()
+        self.subscribers = 0
+        self.poller_task = None
+        self.poll_now = asyncio.Event()
         self.last_requested_bearing = Rotator.ERROR_UNKNOWN
-        self.serial_port = SerialPort(baudrate=Rotator.BAUD_RATE, timeout=0)
+        self.serial_port = SerialPort(name=port_name, baudrate=Rotator.BAUD_RATE, timeout=0)
+        # serial statistics, for metrics.
+        self.transactions = 0
+        self.no_replies = 0
+        self.bad_replies = 0
+        self.busy = 0
         self.initialized = False
         self.serial_port_locked = False
 
@@ -65,6 +133,15 @@ class Rotator:
         self.initialized = True
 
     async def send_and_receive(self, message, timeout=0.05):
+        bytes_received = await self.send_and_receive_into(message, timeout)
+        return self.buffer[:bytes_received].decode()
+
+    @profiled_async('dcu1_rotator:send_and_receive_into')
+    async def send_and_receive_into(self, message, timeout=0.05):
+        """
+        send a message and leave the response in self.buffer.
+        :return: number of bytes received
+        """
         # drain receive buffer
         while len(self.serial_port.read()) > 0:
             pass
@@ -73,8 +150,8 @@ class Rotator:
         self.serial_port.flush()
         # wait a short bit
         await asyncio.sleep(timeout)
-        bytes_received = self.serial_port.readinto(self.buffer)
-        return self.buffer[:bytes_received].decode()
+        self.transactions += 1
+        return self.serial_port.readinto(self.buffer) or 0
 
     async def get_rotator_bearing(self):
         count = 0
@@ -82,28 +159,115 @@ class Rotator:
             count += 1
             await asyncio.sleep(0.50)
         if self.serial_port_locked:
+            self.busy += 1
             return Rotator.ERROR_BUSY
         self.serial_port_locked = True
         try:
             if not self.initialized:
                 await self.initialize()
-            result = await self.send_and_receive(b'AI1;')
-            if len(result) == 0:
-                self.last_bearing = Rotator.ERROR_NO_DATA
+            buffer = self.buffer
+            bytes_received = await self.send_and_receive_into(b'AI1;')
+            if bytes_received == 0:
+                self.no_replies += 1
+                bearing = Rotator.ERROR_NO_DATA
             else:
-                if result[0] == ';':
-                    self.last_bearing = int(result[1:])
-                else:
-                    logging.warning(f'unexpected result: "{result}"', 'dcu1_rotator:get_rotator_bearing')
-                    self.last_bearing = Rotator.ERROR_BAD_DATA
+                bearing = None
+                if buffer[0] == 0x3b:  # ';' then whole degrees
+                    bearing = parse_tenths(buffer, 1, digits_end(buffer, 1, bytes_received))
+                if bearing is None:
+                    logging.warning('unexpected result: "%s"', 'dcu1_rotator:get_rotator_bearing',
+                                    bytes(buffer[:bytes_received]))
+                    self.bad_replies += 1
+                    bearing = Rotator.ERROR_BAD_DATA
         except Exception as ex:
-            logging.exception(f'exception in get_rotator_bearing', 'dcu1_rotator:get_rotator_bearing', exc_info=ex)
+            logging.exception('exception in get_rotator_bearing', 'dcu1_rotator:get_rotator_bearing', exc_info=ex)
             print(ex)
-            self.last_bearing = Rotator.ERROR_ASYNC
+            bearing = Rotator.ERROR_ASYNC
         finally:
             self.serial_port_locked = False
+        self._update_bearing(bearing)
+        return bearing
+
+    def _update_bearing(self, bearing):
+        self.last_bearing_time = milliseconds()
+        if bearing != self.last_bearing:
+            self.last_bearing = bearing
+            # wake everyone waiting on the old event, new waiters get a fresh one.
+            changed = self.bearing_changed
+            self.bearing_changed = asyncio.Event()
+            changed.set()
+
+    def plan_bearing(self, goazi, offset=0, bidirectional=False):
+        """
+        pick the fastest rotator position for a requested heading, see plan_rotation().
+        :param goazi: requested heading in tenths of degrees
+        :param offset: antenna offset in tenths of degrees
+        :param bidirectional: True if the reciprocal heading is just as good
+        :return: bearing to pass to set_rotator_bearing
+        """
+        return plan_rotation(self.last_bearing, goazi, offset, bidirectional, self.overlap * TENTHS_PER_DEGREE)
+
+    def bearing_age(self):
+        """
+        :return: age of the cached bearing in milliseconds
+        """
+        return milliseconds_diff(milliseconds(), self.last_bearing_time)
+
+    async def get_cached_bearing(self, max_age=BEARING_MAX_AGE_MS):
+        """
+        get the bearing, answering from the cache if it is fresh enough.
+        many clients polling at once share one serial transaction.
+        """
+        count = 0
+        while self.serial_port_locked and count < 50:  # a read may be in progress, its result might do.
+            count += 1
+            await asyncio.sleep(0.010)
+        if self.last_bearing >= 0 and self.bearing_age() < max_age:
+            return self.last_bearing
+        return await self.get_rotator_bearing()
+
+    async def wait_for_bearing_change(self):
+        """
+        wait until the bearing changes.  the caller must be subscribed so that it gets polled.
+        :return: the new bearing
+        """
+        await self.bearing_changed.wait()
         return self.last_bearing
 
+    def subscribe(self):
+        """
+        register interest in bearing changes.  one poller serves all subscribers.
+        """
+        self.subscribers += 1
+        if self.poller_task is None:
+            self.poller_task = asyncio.create_task(self._poll_bearing())
+
+    def unsubscribe(self):
+        if self.subscribers > 0:
+            self.subscribers -= 1
+
+    async def _poll_bearing(self):
+        # poll quickly while the bearing is changing, back off while it is not.
+        # a set_rotator_bearing() wakes the poller so that the movement is seen right away.
+        interval = Rotator.POLL_INTERVAL
+        try:
+            while self.subscribers > 0:
+                before = self.last_bearing
+                bearing = await self.get_cached_bearing(int(Rotator.POLL_INTERVAL * 1000))
+                if bearing != before:
+                    interval = Rotator.POLL_INTERVAL
+                else:
+                    interval = min(interval * 2, Rotator.POLL_INTERVAL_IDLE)
+                self.poll_now.clear()
+                try:
+                    await asyncio.wait_for(self.poll_now.wait(), interval)
+                    interval = Rotator.POLL_INTERVAL
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.poller_task = None
+
+    @profiled_async('dcu1_rotator:set_rotator_bearing')
     async def set_rotator_bearing(self, bearing):
         locked_count = 0
         while self.serial_port_locked and locked_count < 10:
@@ -111,26 +275,46 @@ class Rotator:
             logging.warning('busy', 'dcu1_rotator:set_rotator_bearing')
             await asyncio.sleep(.050)
         if self.serial_port_locked:
+            self.busy += 1
             result = Rotator.ERROR_BUSY
         else:
             self.serial_port_locked = True
             try:
                 if not self.initialized:
                     await self.initialize()
+                # the controller only takes whole degrees.
+                write_degrees(self.set_command, 3, bearing)
                 if self.primitive:
                     # Hygain DCU-3 set direction
                     # not expecting any response.
-                    message = f'AP1{bearing:03n};'.encode('utf-8')
-                    await self.send_and_receive(message)
+                    await self.send_and_receive(self.set_command)
                     await self.send_and_receive(b'AM1;')
                     self.last_requested_bearing = bearing
                 else:
-                    message = f'AP1{int(bearing):03n}\r'.encode('utf-8')
-                    await self.send_and_receive(message)
+                    await self.send_and_receive(self.set_command)
                 result = bearing
+                self.poll_now.set()  # the rotator is about to move.
             except Exception as ex:
                 print(ex)
                 result = Rotator.ERROR_ASYNC
             finally:
                 self.serial_port_locked = False
         return result
+
+    async def stop_rotator(self):
+        locked_count = 0
+        while self.serial_port_locked and locked_count < 10:
+            locked_count += 1
+            await asyncio.sleep(.050)
+        if self.serial_port_locked:
+            return Rotator.ERROR_BUSY
+        self.serial_port_locked = True
+        try:
+            await self.send_and_receive(b';')  # STOP
+            result = 0
+        except Exception as ex:
+            logging.exception('exception in stop_rotator', 'dcu1_rotator:stop_rotator', exc_info=ex)
+            result = Rotator.ERROR_ASYNC
+        finally:
+            self.serial_port_locked = False
+        return result
@@ -0,0 +1,111 @@
+#
+# ephemeris.py -- low precision sun and moon positions, good to a few tenths of a degree.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+# Formulas are the low precision ones from the Astronomical Almanac.  MicroPython on the RP2040
+# uses single precision floats, so time is carried as whole days plus seconds of the day, and the
+# fast-moving angles are reduced modulo 360 before they lose precision.
+
+import math
+import time
+from utils import profiled
+
+SUN = 'sun'
+MOON = 'moon'
+BODIES = (SUN, MOON)
+
+_SECONDS_PER_DAY = 86400
+# seconds from the time.time() epoch to J2000.0, 2000-01-01 12:00 UTC.  some MicroPython ports count from 2000.
+_J2000_OFFSET = 946728000 if time.gmtime(0)[0] == 1970 else 43200
+
+
+def _sin(degrees):
+    return math.sin(math.radians(degrees))
+
+
+def _cos(degrees):
+    return math.cos(math.radians(degrees))
+
+
+def _sun_ecliptic(d):
+    # ecliptic longitude and latitude of the sun, degrees, for d days since J2000.0
+    g = (357.528 + 0.9856003 * d) % 360
+    longitude = (280.460 + 0.9856474 * d + 1.915 * _sin(g) + 0.020 * _sin(2 * g)) % 360
+    return longitude, 0.0, 0.0
+
+
+def _moon_ecliptic(d):
+    # ecliptic longitude, latitude and horizontal parallax of the moon, degrees
+    t = d / 36525
+    a1 = (134.9 + 477198.85 * t) % 360
+    a2 = (259.2 - 413335.38 * t) % 360
+    a3 = (235.7 + 890534.23 * t) % 360
+    a4 = (269.9 + 954397.70 * t) % 360
+    longitude = ((218.32 + 481267.881 * t) % 360 + 6.29 * _sin(a1) - 1.27 * _sin(a2) + 0.66 * _sin(a3)
+                 + 0.21 * _sin(a4) - 0.19 * _sin(357.5 + 35999.05 * t) - 0.11 * _sin(186.6 + 966404.05 * t))
+    latitude = (5.13 * _sin((93.3 + 483202.03 * t) % 360) + 0.28 * _sin((228.2 + 960400.87 * t) % 360)
+                - 0.28 * _sin((318.3 + 6003.18 * t) % 360) - 0.17 * _sin((217.6 - 407332.20 * t) % 360))
+    parallax = 0.9508 + 0.0518 * _cos(a1) + 0.0095 * _cos(a2) + 0.0078 * _cos(a3) + 0.0028 * _cos(a4)
+    return longitude % 360, latitude, parallax
+
+
+@profiled('ephemeris:position')
+def position(body, latitude, longitude, utc_seconds=None):
+    """
+    azimuth and elevation of the sun or moon seen from a place on the earth.
+    :param body: SUN or MOON
+    :param latitude: observer latitude, degrees north
+    :param longitude: observer longitude, degrees east
+    :param utc_seconds: time.time() value, now if None
+    :return: (azimuth, elevation) in tenths of degrees
+    """
+    if utc_seconds is None:
+        utc_seconds = time.time()
+    seconds = int(utc_seconds) - _J2000_OFFSET
+    day_seconds = seconds % _SECONDS_PER_DAY
+    d = seconds / _SECONDS_PER_DAY
+    if body == MOON:
+        ecliptic_longitude, ecliptic_latitude, parallax = _moon_ecliptic(d)
+    else:
+        ecliptic_longitude, ecliptic_latitude, parallax = _sun_ecliptic(d)
+    obliquity = 23.439 - 0.0000004 * d
+    sin_lon = _sin(ecliptic_longitude)
+    sin_lat = _sin(ecliptic_latitude)
+    cos_lat = _cos(ecliptic_latitude)
+    right_ascension = math.degrees(math.atan2(sin_lon * cos_lat * _cos(obliquity) - sin_lat * _sin(obliquity),
+                                              _cos(ecliptic_longitude) * cos_lat))
+    declination = math.asin(sin_lat * _cos(obliquity) + cos_lat * _sin(obliquity) * sin_lon)
+    # sidereal time: the whole turns per day are dropped, only the fraction of the day is multiplied by 360.
+    sidereal = (280.46061837 + 0.98564736629 * d + 360.0 * day_seconds / _SECONDS_PER_DAY) % 360
+    hour_angle = math.radians(sidereal + longitude - right_ascension)
+    observer = math.radians(latitude)
+    elevation = math.asin(math.sin(observer) * math.sin(declination) +
+                          math.cos(observer) * math.cos(declination) * math.cos(hour_angle))
+    azimuth = math.atan2(-math.sin(hour_angle) * math.cos(declination),
+                         math.cos(observer) * math.sin(declination) -
+                         math.sin(observer) * math.cos(declination) * math.cos(hour_angle))
+    elevation = math.degrees(elevation) - parallax * math.cos(elevation)  # topocentric, matters for the moon
+    return int(math.degrees(azimuth) * 10 + 0.5) % 3600, int(elevation * 10 + (0.5 if elevation > 0 else -0.5))
@@ -0,0 +1,130 @@
+#
+# heap.py -- heap use and fragmentation telemetry.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import asyncio
+import gc
+from loop_monitor import set_activity
+from utils import milliseconds, milliseconds_diff, upython
+
+if not upython:
+    def const(i):
+        return i
+
+SAMPLE_INTERVAL = 10  # seconds between free heap samples.
+PROBE_GRANULARITY = const(256)  # bytes
+
+if upython:
+    mem_alloc = gc.mem_alloc
+    mem_free = gc.mem_free
+else:
+    # cpython has no fixed heap to measure.
+    def mem_alloc():
+        return 0
+
+    def mem_free():
+        return 0
+
+
+def largest_free_block(limit=None):
+    """
+    find the largest block that can be allocated, by trying to allocate it.
+    a failed allocation makes micropython collect and retry, so this collects several times and holds up
+    every other task for tens of milliseconds.  it is only run when asked for.
+    :param limit: upper bound to search, the free heap by default
+    :return: size in bytes, to PROBE_GRANULARITY, or 0 on cpython
+    """
+    if not upython:
+        return 0
+    set_activity('heap:largest_free_block')
+    gc.collect()
+    low = 0
+    high = (limit if limit is not None else gc.mem_free()) // PROBE_GRANULARITY
+    while low < high:
+        middle = (low + high + 1) // 2
+        try:
+            block = bytearray(middle * PROBE_GRANULARITY)
+            del block
+            low = middle
+        except MemoryError:
+            high = middle - 1
+    gc.collect()
+    return low * PROBE_GRANULARITY
+
+
+class HeapMonitor:
+    """
+    samples the free heap and keeps its range.  probe() finds the largest free block on request.
+    a largest free block that shrinks while the free heap does not is fragmentation.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.free = -1
+        self.free_min = -1
+        self.free_max = -1
+        self.largest_block = -1
+        self.largest_block_min = -1
+        self.probe_ms = -1
+        self.run = True
+
+    def sample(self):
+        free = mem_free()
+        self.free = free
+        if self.samples == 0 or free < self.free_min:
+            self.free_min = free
+        if free > self.free_max:
+            self.free_max = free
+        self.samples += 1
+
+    def probe(self):
+        t0 = milliseconds()
+        largest = largest_free_block(self.free if self.free >= 0 else None)
+        self.probe_ms = milliseconds_diff(milliseconds(), t0)
+        self.largest_block = largest
+        if self.largest_block_min < 0 or largest < self.largest_block_min:
+            self.largest_block_min = largest
+
+    async def sampler(self):
+        while self.run:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def status(self):
+        return {
+            'allocated': mem_alloc(),
+            'free': self.free,
+            'free_min': self.free_min,
+            'free_max': self.free_max,
+            'largest_block': self.largest_block,
+            'largest_block_min': self.largest_block_min,
+            'probe_ms': self.probe_ms,
+            'samples': self.samples,
+        }
+
+    def stop(self):
+        self.run = False
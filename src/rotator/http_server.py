@@ -25,13 +25,17 @@ OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 __version__ = '0.1.11'  # 2025-12-31
 
+import asyncio
 import gc
 import json
 import os
 import re
 import micro_logging as logging
+from heap import mem_alloc, mem_free
+from loop_monitor import set_activity
+from metrics import MetricsBuffer, registry
 
-from utils import milliseconds, safe_int, upython
+from utils import milliseconds, profiled_async, safe_int, upython
 if not upython:
     def const(i):
         return i
@@ -59,6 +63,15 @@ _MP_DATA = const(3)
 _MP_END_BOUND = const(4)
 
 _MAX_UPLOAD_SIZE = const(65536)  # biggest allowed file upload.
+_METRICS_BUFFER_SIZE = const(2048)  # the exposition is sent in pieces this size.
+CT_PROMETHEUS = b'text/plain; version=0.0.4'
+ROUTE_CONTENT = b'content'  # the route label for files served from the content directory.
+
+http_requests = registry.labeled_counter('rotator_http_requests_total', 'HTTP requests by route and status.',
+                                         ('route', 'status'))
+http_request_duration = registry.histogram('rotator_http_request_duration_seconds', 'HTTP request latency.',
+                                           (10, 25, 50, 100, 250, 500, 1000, 2500, 5000))
+http_response_bytes = registry.counter('rotator_http_response_bytes_total', 'HTTP response bytes sent.')
 DOTS = '..'
 SEP = '/'
 
@@ -124,21 +137,25 @@ class HttpServer:
                         b'/api/upload_file': api_upload_file_callback,
                         b'/api/remove_file': api_remove_file_callback,
                         b'/api/rename_file': api_rename_file_callback,
+                        b'/metrics': metrics_callback,
                         }
+        self.metrics_buffer = MetricsBuffer(_METRICS_BUFFER_SIZE)
+        self.metrics_lock = asyncio.Lock()
 
         self.buffer = bytearray(_BUFFER_SIZE)
         self.bmv = memoryview(self.buffer)
 
     def route(self, uri):
         if isinstance(uri, str):
-            logging.warning(f'uri {uri} is str not bytes', 'http_server:add_uri_callback')
+            logging.warning('uri %s is str not bytes', 'http_server:add_uri_callback', uri)
             uri = uri.encode('utf-8')
 
         def decorator(func):
-            self.uri_map[uri] = func
+            self.uri_map[uri] = profiled_async(uri.decode())(func)  # unwrapped unless profiling is on
             return func
         return decorator
 
+    @profiled_async('http_server:serve_content')
     async def serve_content(self, writer, filename):
         if '..' in filename or filename.startswith('/..'):
             response = b'<html><body><p>403 -- Forbidden.</p></body></html>'
@@ -181,7 +198,7 @@ class HttpServer:
                             await writer.drain()
                         break
         except Exception as exc:
-            logging.error(f'{type(exc)} {exc}', 'http_server:serve_content')
+            logging.error('%s %s', 'http_server:serve_content', type(exc), exc)
         return content_length, HTTP_STATUS_OK
 
     async def start_response(self, writer, http_status:int=HTTP_STATUS_OK, content_type:bytes=b'', response_size:int=0, extra_headers:list[bytes]=None):
@@ -219,7 +236,7 @@ class HttpServer:
             if content_length > 0:
                 writer.write(response)
         else:
-            logging.error(f'trying to serialize {typ} response.', 'http_server:send_simple_response')
+            logging.error('trying to serialize %s response.', 'http_server:send_simple_response', typ)
         await writer.drain()
         return content_length
 
@@ -238,24 +255,26 @@ class HttpServer:
                 args[arg_parts[0]] = arg_parts[1]
         return args
 
+    @profiled_async('http_server:serve_http_client')
     async def serve_http_client(self, reader, writer):
         gc.collect()
-        # micropython.mem_info()
+        alloc0 = mem_alloc()
         t0 = milliseconds()
         http_status = HTTP_STATUS_INTERNAL_SERVER_ERROR
         bytes_sent = 0
+        route = ROUTE_CONTENT
         partner = writer.get_extra_info('peername')[0]
         if logging.should_log(logging.DEBUG):
-            logging.debug(f'web client connected from {partner}', 'http_server:serve_http_client')
+            logging.debug('web client connected from %s', 'http_server:serve_http_client', partner)
         request_line = await reader.readline()
         request = request_line.strip()
         if logging.should_log(logging.DEBUG):
-            logging.debug(f'request: {request}', 'http_server:serve_http_client')
+            logging.debug('request: %s', 'http_server:serve_http_client', request)
         pieces = request.split(b' ')
         if len(pieces) != 3:  # does the http request line look approximately correct?
             http_status = HTTP_STATUS_BAD_REQUEST
             response = b'Bad Request !=3'
-            logging.warning(f'Bad request, wrong number of pieces: {pieces}')
+            logging.warning('Bad request, wrong number of pieces: %s', None, pieces)
             bytes_sent = await self.send_simple_response(writer, http_status, self.CT_TEXT_HTML, response)
         else:
             verb = pieces[0]
@@ -274,7 +293,7 @@ class HttpServer:
                 response = b'<html><body><p>only GET and POST are supported</p></body></html>'
                 bytes_sent = await self.send_simple_response(writer, http_status, self.CT_TEXT_HTML, response)
             elif protocol not in {b'HTTP/1.0', b'HTTP/1.1'}:
-                logging.warning(f'bad request, wrong http protocol {protocol}', 'http_server:serve_http_client')
+                logging.warning('bad request, wrong http protocol %s', 'http_server:serve_http_client', protocol)
                 http_status = HTTP_STATUS_BAD_REQUEST
                 response = b'protocol %s is not supported' % protocol
                 bytes_sent = await self.send_simple_response(writer, http_status, self.CT_TEXT_HTML, response)
@@ -302,23 +321,29 @@ class HttpServer:
                 if verb == HTTP_VERB_GET:
                     args = self.unpack_args(query_args)
                 elif verb == HTTP_VERB_POST:
+                    args = self.unpack_args(query_args)  # like ?rotor=name, the posted values win.
                     if request_content_length > 0:
                         if request_content_type.startswith(self.CT_APP_WWW_FORM):
                             data = await reader.read(request_content_length)
-                            args = self.unpack_args(data)
+                            args.update(self.unpack_args(data))
                         elif request_content_type.startswith(self.CT_APP_JSON):
                             data = await reader.read(request_content_length)
                             try:
-                                args = json.loads(data.decode())
+                                posted = json.loads(data.decode())
+                                if isinstance(posted, dict):
+                                    args.update(posted)
+                                else:
+                                    args = posted
                             except Exception as e:
                                 args = {}
-                                logging.error(f'cannot decode posted JSON "{data}": {e}',
-                                              'http_server:serve_http_client')
-                        elif not request_content_type.startswith(self.CT_MULTIPART_FORM):
-                            logging.warning(f'warning: unhandled content_type {request_content_type}',
-                                            'http_server:serve_http_client')
-                            logging.warning(f'request_content_length={request_content_length}',
-                                            'http_server:serve_http_client')
+                                logging.error('cannot decode posted JSON "%s": %s', 'http_server:serve_http_client',
+                                              data, e)
+                        elif not (request_content_type.startswith(self.CT_MULTIPART_FORM) or
+                                  request_content_type.startswith(self.CT_TEXT_TEXT)):  # the callback reads these
+                            logging.warning('warning: unhandled content_type %s', 'http_server:serve_http_client',
+                                            request_content_type)
+                            logging.warning('request_content_length=%s', 'http_server:serve_http_client',
+                                            request_content_length)
                 else:  # bad request
                     http_status = HTTP_STATUS_BAD_REQUEST
                     response = b'only GET and POST are supported'
@@ -326,8 +351,10 @@ class HttpServer:
                     bytes_sent = await self.send_simple_response(writer, http_status, self.CT_TEXT_TEXT, response)
 
                 if verb in (HTTP_VERB_GET, HTTP_VERB_POST):
+                    set_activity(target)
                     callback = self.uri_map.get(target)
                     if callback is not None:
+                        route = target
                         bytes_sent, http_status = await callback(self, verb, args, reader, writer, request_headers)
                     else:
                         content_file = target[1:] if target.startswith(b'/') else target
@@ -337,9 +364,15 @@ class HttpServer:
         writer.close()
         await writer.wait_closed()
         elapsed = milliseconds() - t0
+        # net bytes allocated while serving the request: anything collected on the way is not counted,
+        # so this undercounts, or goes negative, when a collection runs during the request.
+        allocated = mem_alloc() - alloc0
+        http_requests.inc((route, http_status))
+        http_request_duration.observe(elapsed)
+        http_response_bytes.inc(bytes_sent)
         if logging.should_log(logging.INFO):
-            logging.info(f'{partner} {request} {http_status} {bytes_sent} {elapsed} ms',
-                         'http_server:serve_http_client')
+            logging.info('%s %s %s %s %s ms net alloc %d free %d', 'http_server:serve_http_client', partner, request,
+                         http_status, bytes_sent, elapsed, allocated, mem_free())
         gc.collect()
 
 #
@@ -406,7 +439,7 @@ async def api_upload_file_callback(http, verb, args, reader, writer, request_hea
                 http_status = HTTP_STATUS_CONTENT_TOO_LARGE
             else:
                 remaining_content_length = request_content_length
-                logging.info(f'upload content length {request_content_length}', 'main:api_upload_file_callback')
+                logging.info('upload content length %d', 'main:api_upload_file_callback', request_content_length)
                 start_boundary = http.HYPHENS + boundary
                 end_boundary = start_boundary + http.HYPHENS
                 state = _MP_START_BOUND
@@ -468,7 +501,8 @@ async def api_upload_file_callback(http, verb, args, reader, writer, request_hea
                                 if line == start_boundary:
                                     state = _MP_HEADERS
                                 else:
-                                    logging.error(f'expecting start boundary, got {line}', 'main:api_upload_file_callback')
+                                    logging.error('expecting start boundary, got %s', 'main:api_upload_file_callback',
+                                                  line)
                             elif state == _MP_HEADERS:
                                 if len(line) == 0:
                                     state = _MP_DATA
@@ -486,11 +520,12 @@ async def api_upload_file_callback(http, verb, args, reader, writer, request_hea
                                 if line == end_boundary:
                                     state = _MP_START_BOUND
                                 else:
-                                    logging.error(f'expecting end boundary, got {line}', 'main:api_upload_file_callback')
+                                    logging.error('expecting end boundary, got %s', 'main:api_upload_file_callback',
+                                                  line)
                             else:
                                 http_status = HTTP_STATUS_INTERNAL_SERVER_ERROR
                                 response = b'unmanaged state %d' % state
-        logging.info(f'upload response: {response}', 'http_server:api_upload_file_callback')
+        logging.info('upload response: %s', 'http_server:api_upload_file_callback', response)
         bytes_sent = await http.send_simple_response(writer, http_status, http.CT_TEXT_TEXT, response)
     else:
         response = b'POST only.'
@@ -541,3 +576,35 @@ async def api_rename_file_callback(http, verb, args, reader, writer, request_hea
         response = b'bad file name'
     bytes_sent = await http.send_simple_response(writer, http_status, http.CT_APP_JSON, response)
     return bytes_sent, http_status
+
+
+# noinspection PyUnusedLocal
+async def metrics_callback(http, verb, args, reader, writer, request_headers=None):
+    """
+    render the shared metrics registry in the prometheus text format.
+    each metric is written into the preallocated buffer, which is sent whenever the next one does not fit.
+    """
+    bytes_sent = 0
+    async with http.metrics_lock:  # one scrape at a time, they share the buffer.
+        await http.start_response(writer, HTTP_STATUS_OK, CT_PROMETHEUS)
+        out = http.metrics_buffer
+        out.reset()
+        for metric in registry.metrics:
+            start = out.length
+            metric.render(out)
+            if out.overflow:
+                out.length = start
+                writer.write(out.mv[:start])
+                bytes_sent += start
+                await writer.drain()
+                out.reset()
+                metric.render(out)
+                if out.overflow:
+                    logging.error('metric %s does not fit the buffer', 'http_server:metrics_callback',
+                                  metric.name.decode())
+                    out.reset()
+        writer.write(out.mv[:out.length])
+        bytes_sent += out.length
+        await writer.drain()
+        out.reset()
+    return bytes_sent, HTTP_STATUS_OK
@@ -0,0 +1,192 @@
+#
+# locator.py -- great-circle azimuths to Maidenhead grids and callsign prefixes.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import math
+import struct
+
+import micro_logging as logging
+from tenths import FULL_CIRCLE
+
+EARTH_RADIUS_KM = 6371.0
+PREFIX_LENGTH = 4
+# prefix padded with spaces, latitude and longitude in hundredths of degrees, east and north positive.
+PREFIX_RECORD_FORMAT = '>4shh'
+PREFIX_RECORD_SIZE = 8
+_SPACE = 0x20
+# these may follow a '/' in a callsign and say nothing about where the station is.
+_CALL_SUFFIXES = ('P', 'M', 'MM', 'AM', 'QRP', 'A')
+
+
+def valid_grid(grid) -> bool:
+    """
+    :return: True if grid is a 2, 4, 6 or 8 character Maidenhead locator like FN42 or FN42hn
+    """
+    if not isinstance(grid, str) or len(grid) not in (2, 4, 6, 8):
+        return False
+    grid = grid.upper()
+    for i, c in enumerate(grid):
+        pair = i // 2
+        if pair == 0:
+            ok = 'A' <= c <= 'R'
+        elif pair == 2:
+            ok = 'A' <= c <= 'X'
+        else:
+            ok = '0' <= c <= '9'
+        if not ok:
+            return False
+    return True
+
+
+def grid_to_lat_lon(grid):
+    """
+    :return: (latitude, longitude) of the center of a Maidenhead grid square, in degrees
+    """
+    grid = grid.upper()
+    lon = -180.0
+    lat = -90.0
+    lon_size = 20.0
+    lat_size = 10.0
+    for pair in range(len(grid) // 2):
+        if pair == 0:
+            base = 'A'
+            divisions = 18
+        elif pair == 2:
+            base = 'A'
+            divisions = 24
+        else:
+            base = '0'
+            divisions = 10
+        if pair > 0:
+            lon_size /= divisions
+            lat_size /= divisions
+        lon += (ord(grid[pair * 2]) - ord(base)) * lon_size
+        lat += (ord(grid[pair * 2 + 1]) - ord(base)) * lat_size
+    return lat + lat_size / 2, lon + lon_size / 2
+
+
+def azimuth_and_distance(from_lat, from_lon, to_lat, to_lon):
+    """
+    great-circle initial bearing and distance.
+    :return: (azimuth in tenths of degrees, distance in km)
+    """
+    lat1 = math.radians(from_lat)
+    lat2 = math.radians(to_lat)
+    delta_lon = math.radians(to_lon - from_lon)
+    y = math.sin(delta_lon) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(delta_lon)
+    azimuth = int(math.degrees(math.atan2(y, x)) * 10 + 0.5) % FULL_CIRCLE
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(delta_lon / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+    return azimuth, int(distance + 0.5)
+
+
+def call_prefix_part(call):
+    """
+    pick the part of a callsign that says where the station is: VE3/N1KDO -> VE3, N1KDO/P -> N1KDO.
+    """
+    call = call.upper()
+    if '/' not in call:
+        return call
+    parts = [part for part in call.split('/') if part and part not in _CALL_SUFFIXES and not part.isdigit()]
+    if not parts:
+        return call
+    best = parts[0]
+    for part in parts:
+        if len(part) < len(best):
+            best = part
+    return best
+
+
+class PrefixTable:
+    """
+    callsign prefix to location lookup in a packed table of fixed-size records, sorted by prefix.
+    the table is read once and searched in place, nothing is parsed per lookup.
+    see src/loader/make_prefix_table.py.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.table = None
+        self.count = 0
+        self.key = bytearray(PREFIX_LENGTH)
+
+    def load(self):
+        try:
+            with open(self.filename, 'rb') as table_file:
+                self.table = table_file.read()
+            self.count = len(self.table) // PREFIX_RECORD_SIZE
+            logging.info('loaded %d prefixes from %s', 'locator:PrefixTable:load', self.count, self.filename)
+        except OSError as ex:
+            logging.exception('cannot read %s', 'locator:PrefixTable:load', self.filename, exc_info=ex)
+            self.table = b''
+            self.count = 0
+
+    def _compare(self, index):
+        # compare the search key to record index without slicing, like strcmp.
+        table = self.table
+        key = self.key
+        offset = index * PREFIX_RECORD_SIZE
+        for i in range(PREFIX_LENGTH):
+            diff = key[i] - table[offset + i]
+            if diff:
+                return diff
+        return 0
+
+    def _find(self):
+        low = 0
+        high = self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            diff = self._compare(middle)
+            if diff == 0:
+                return middle
+            if diff < 0:
+                high = middle - 1
+            else:
+                low = middle + 1
+        return -1
+
+    def lookup(self, call):
+        """
+        find the location of the longest prefix in the table that matches call.
+        :return: (latitude, longitude) in degrees, or None if no prefix matches
+        """
+        if self.table is None:
+            self.load()
+        call = call_prefix_part(call)
+        for c in call:
+            if ord(c) > 127:  # not a callsign, and would not fit the key
+                return None
+        key = self.key
+        for length in range(min(len(call), PREFIX_LENGTH), 0, -1):
+            for i in range(PREFIX_LENGTH):
+                key[i] = ord(call[i]) if i < length else _SPACE
+            index = self._find()
+            if index >= 0:
+                _, lat, lon = struct.unpack_from(PREFIX_RECORD_FORMAT, self.table, index * PREFIX_RECORD_SIZE)
+                return lat / 100, lon / 100
+        return None
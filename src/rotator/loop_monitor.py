@@ -0,0 +1,134 @@
+#
+# loop_monitor.py -- event loop stall detector.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import asyncio
+from array import array
+import micro_logging as logging
+from utils import get_timestamp, microseconds, microseconds_diff, upython
+
+if not upython:
+    def const(i):
+        return i
+
+HEARTBEAT_MS = const(50)  # how often the heartbeat task asks to run.
+STALL_LOG_MS = const(100)  # stalls at least this long are logged.
+SLOWEST = const(8)  # how many of the slowest stalls are kept.
+# upper bounds of the lag histogram buckets in milliseconds, the last bucket counts the rest.
+LAG_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# what ran most recently.  code that might block marks itself here, the heartbeat reads and clears it,
+# so a stall is tagged with the last marked activity since the previous heartbeat.  work that does not mark
+# itself is blamed on whatever marked itself before it, so each known blocking section calls set_activity.
+activity = None
+
+
+def set_activity(name):
+    global activity
+    activity = name
+
+
+class LoopMonitor:
+    """
+    a heartbeat task that measures how late it is woken.  nothing else can run while a task blocks
+    the event loop, so the heartbeat's lateness is how long serial, N1MM, and web handling were held up.
+    """
+
+    def __init__(self, interval_ms=HEARTBEAT_MS):
+        self.interval_ms = interval_ms
+        self.histogram = array('l', [0] * (len(LAG_BUCKETS_MS) + 1))
+        self.beats = 0
+        self.stalls = 0  # lags of at least STALL_LOG_MS
+        self.max_lag_ms = 0
+        self.slowest_lag_ms = array('l', [0] * SLOWEST)
+        self.slowest_activity = [None] * SLOWEST
+        self.slowest_time = [None] * SLOWEST
+        self.run = True
+
+    def record(self, lag_ms):
+        global activity
+        name = activity
+        activity = None
+        self.beats += 1
+        bucket = 0
+        for limit in LAG_BUCKETS_MS:
+            if lag_ms < limit:
+                break
+            bucket += 1
+        self.histogram[bucket] += 1
+        if lag_ms > self.max_lag_ms:
+            self.max_lag_ms = lag_ms
+        if lag_ms >= STALL_LOG_MS:
+            self.stalls += 1
+            if isinstance(name, bytes):
+                name = name.decode()
+            logging.warning('event loop stalled %d ms, last ran %s', 'loop_monitor:record', lag_ms, name)
+            # replace the shortest of the slowest stalls.
+            shortest = 0
+            for i in range(1, SLOWEST):
+                if self.slowest_lag_ms[i] < self.slowest_lag_ms[shortest]:
+                    shortest = i
+            if lag_ms > self.slowest_lag_ms[shortest]:
+                self.slowest_lag_ms[shortest] = lag_ms
+                self.slowest_activity[shortest] = name
+                self.slowest_time[shortest] = get_timestamp()
+
+    async def heartbeat(self):
+        interval_us = self.interval_ms * 1000
+        interval = self.interval_ms / 1000
+        last = microseconds()
+        while self.run:
+            await asyncio.sleep(interval)
+            now = microseconds()
+            lag_us = microseconds_diff(now, last) - interval_us
+            last = now
+            self.record(lag_us // 1000 if lag_us > 0 else 0)
+
+    def status(self):
+        slowest = []
+        for i in range(SLOWEST):
+            if self.slowest_lag_ms[i]:
+                slowest.append({
+                    'lag_ms': self.slowest_lag_ms[i],
+                    'activity': self.slowest_activity[i],
+                    'time': self.slowest_time[i],
+                })
+        slowest.sort(key=lambda item: item['lag_ms'], reverse=True)
+        buckets = {}
+        for i in range(len(LAG_BUCKETS_MS)):
+            buckets['<%d' % LAG_BUCKETS_MS[i]] = self.histogram[i]
+        buckets['>=%d' % LAG_BUCKETS_MS[-1]] = self.histogram[-1]
+        return {
+            'interval_ms': self.interval_ms,
+            'beats': self.beats,
+            'stalls': self.stalls,
+            'max_lag_ms': self.max_lag_ms,
+            'lag_ms': buckets,
+            'slowest': slowest,
+        }
+
+    def stop(self):
+        self.run = False
@@ -27,18 +27,33 @@ __version__ = '0.1.1'  # 2026-01-01
 
 import asyncio
 import gc
-import json
 import socket
+import time
+from array import array
 import micro_logging as logging
 
+from config_store import config_store  # first, it sets up profiling for the modules below.
+import ephemeris
+from heap import HeapMonitor
+from loop_monitor import LoopMonitor, set_activity
+from metrics import COUNTER, GAUGE, registry
 from http_server import (HttpServer,
                          HTTP_STATUS_OK, HTTP_STATUS_BAD_REQUEST, HTTP_STATUS_CONFLICT,
                          HTTP_VERB_GET, HTTP_VERB_POST)
+from locator import PrefixTable, azimuth_and_distance, grid_to_lat_lon, valid_grid
 from morse_code import MorseCode
 import n1mm_udp
-from dcu1_rotator import Rotator
-from utils import milliseconds, safe_int, upython
+import syslog_udp
+from dcu1_rotator import Rotator, travel_time
+import utils
+from utils import (get_timestamp, micropython, milliseconds, profile_report, profile_reset, safe_int,
+                   upython, uptime_seconds)
 from picow_network import PicowNetwork
+from rotctld import RotctldServer
+from scan import Scanner, range_bearings
+from trajectory import MAX_POINTS as MAX_TRAJECTORY_POINTS, Trajectory
+from tenths import (FULL_CIRCLE, angle_difference, format_bearing, from_degrees, parse_tenths, to_decimal_degrees,
+                    to_degrees, write_degrees)
 
 if upython:
     # disable pylint import error
@@ -47,56 +62,152 @@ if upython:
 else:
     from not_machine import machine
 
+    def const(i):
+        return i
+
 # noinspection PyUnboundLocalVariable
 onboard = machine.Pin('LED', machine.Pin.OUT, value=0)
 onboard.on()
 morse_led = machine.Pin(2, machine.Pin.OUT, value=0)  # status LED
 reset_button = machine.Pin(3, machine.Pin.IN, machine.Pin.PULL_UP)
 
-CONFIG_FILE = 'data/config.json'
 CONTENT_DIR = 'content/'
 DEFAULT_SECRET = 'NorthSouth'
 DEFAULT_SSID = 'Rotator'
 DEFAULT_TCP_PORT = 73
 DEFAULT_WEB_PORT = 80
+DEFAULT_ROTCTLD_PORT = 4533
+PREFIX_TABLE_FILE = 'prefixes.bin'
+DEFAULT_BEAMWIDTH = 10  # degrees
+TRACK_INTERVAL = 10  # seconds between tracking checks
+TRACK_TABLE_SIZE = 60  # precomputed positions per table
+TRACK_TABLE_STEP = 120  # seconds between precomputed positions, so one table covers two hours
+MAX_BATCH_TARGETS = 32
+CLOCK_RETRY_MIN = 15  # seconds before the first NTP retry, doubling after each failure
+CLOCK_RETRY_MAX = 900
+CLOCK_RESYNC_INTERVAL = 6 * 3600  # seconds between NTP updates once the clock is set
+
+# DCU-1 serial protocol, pre-encoded.  the digit that follows is the rotator number.
+CMD_GET_BEARING = b'AI'
+CMD_SET_BEARING = b'AP'
+CMD_MOVE = b'AM'
+CMD_PUSH = b'AU'  # extension: AU1; sends ;nnn whenever the bearing changes, AU0; stops.
+_CMD_START = const(0x41)  # 'A'
+_CMD_SEMICOLON = const(0x3b)  # ';'
+_CMD_CR = const(0x0d)
+_CMD_ONE = const(0x31)  # '1'
+_SERIAL_CHUNK_SIZE = const(64)
+_SERIAL_COMMAND_SIZE = const(8)
 
 N1MM_ROTOR_BROADCAST_PORT = 12040
 N1MM_BROADCAST_FROM_ROTOR_PORT = 13010
 
 # globals
 keep_running = True
-rotator = None
+rotator = None  # the default (first) rotator
+rotators = {}  # rotor name -> Rotator
+rotor_list = []  # Rotators in configuration order, DCU-1 rotator number - 1
+service_manager = None
 
 # http server
 http_server = HttpServer(content_dir=CONTENT_DIR)
 
+# free heap and fragmentation, sampled in the background.
+heap_monitor = HeapMonitor()
+
+# event loop stalls, measured by a heartbeat task.
+loop_monitor = LoopMonitor()
+
+# callsign prefix locations, read on first use.
+prefix_table = PrefixTable(PREFIX_TABLE_FILE)
+
 
 def read_config():
-    try:
-        with open(CONFIG_FILE, 'r') as config_file:
-            config = json.load(config_file)
-    except Exception as ex:
-        logging.exception('failed to load configuration, using default...',
-                          'main:read_config', exc_info= ex)
-        config = {
-            'SSID': 'set your SSID here',
-            'secret': 'secret', 
-            'dhcp': True,
-            'ip_address': '192.168.1.73',
-            'netmask': '255.255.255.0',
-            'gateway': '192.168.1.1',
-            'dns_server': '8.8.8.8',
-            'hostname': 'rotator',
-            'n1mm': False,
-            'tcp_port': '73',
-            'web_port': '80',
-        }
-    return config
+    return config_store.get()
+
+
+def save_config(changes):
+    config_store.update(changes)
+
+
+@micropython.native
+def _match(buffer, prefix) -> bool:
+    # compare the start of the command buffer to a pre-encoded command prefix without slicing.
+    for i in range(len(prefix)):
+        if buffer[i] != prefix[i]:
+            return False
+    return True
+
+
+def get_rotator(name=None):
+    """
+    find a rotator by rotor name, the default rotator if name is None.
+    :return: the Rotator, or None if there is no such rotor
+    """
+    if name is None or name == '':
+        return rotator
+    return rotators.get(name)
+
+
+def load_rotators(config):
+    """
+    create the Rotators from the 'rotors' config item, a list like
+    [{"name": "rotor-50", "uart": 0}, {"name": "rotor-144", "uart": 1, "primitive": true, "overlap": 90}].
+    without it there is one rotator on UART 0 named for the hostname.
+    """
+    global rotator
+    rotors = config.get('rotors')
+    if not rotors:
+        rotors = [{'name': config.get('hostname') or 'rotator', 'uart': 0}]
+    for rotor in rotors:
+        name = rotor.get('name')
+        uart = str(rotor.get('uart', 0))
+        if name in rotators:
+            logging.error('duplicate rotor name "%s"', 'main:load_rotators', name)
+            continue
+        logging.info('rotor "%s" on UART %s', 'main:load_rotators', name, uart)
+        r = Rotator(primitive=rotor.get('primitive', False), name=name, port_name=uart,
+                    overlap=safe_int(rotor.get('overlap', 0), 0))
+        rotators[name] = r
+        rotor_list.append(r)
+    rotator = rotor_list[0]
+
 
+def valid_rotors(rotors):
+    if not isinstance(rotors, list) or not 1 <= len(rotors) <= 2:
+        return False
+    names = []
+    uarts = []
+    for rotor in rotors:
+        if not isinstance(rotor, dict):
+            return False
+        name = rotor.get('name')
+        uart = safe_int(rotor.get('uart', 0), -1)
+        if not isinstance(name, str) or not 1 <= len(name) <= 16 or name in names:
+            return False
+        if uart not in (0, 1) or uart in uarts:
+            return False
+        names.append(name)
+        uarts.append(uart)
+    return True
 
-def save_config(config):
-    with open(CONFIG_FILE, 'w') as config_file:
-        json.dump(config, config_file)
+
+async def push_bearing_changes(writer, r):
+    """
+    write the bearing to a serial client whenever it changes.
+    all pushing clients share a single poller per rotator.
+    """
+    reply = bytearray(b';000')
+    r.subscribe()
+    try:
+        while True:
+            bearing = await r.wait_for_bearing_change()
+            if bearing >= 0:
+                write_degrees(reply, 1, bearing)
+                writer.write(reply)
+                await writer.drain()
+    finally:
+        r.unsubscribe()
 
 
 async def serve_serial_client(reader, writer):
@@ -108,50 +219,94 @@ async def serve_serial_client(reader, writer):
 
     all commands start with 'A'
     all commands end with ';' or CR (ascii 13)
+    a single packet may hold several commands, or a command may span packets.
+
+    the digit after the command letter is the rotator number, AI2; queries the second rotor.
+
+    AI queries are answered from the rotator's shared bearing cache, so any number
+    of polling clients cost about the same serial traffic as one.
     """
-    requested = -1
+    requested = [-1] * len(rotor_list)
+    push_task = None
     t0 = milliseconds()
     partner = writer.get_extra_info('peername')[0]
-    logging.info(f'serial client connected from {partner}', 'main:connect_to_network')
-    buffer = []
+    logging.info('serial client connected from %s', 'main:connect_to_network', partner)
+    chunk = bytearray(_SERIAL_CHUNK_SIZE)
+    command = bytearray(_SERIAL_COMMAND_SIZE)
+    command_length = 0  # 0 means waiting for 'A'
+    reply = bytearray(b';000')
+    use_readinto = hasattr(reader, 'readinto')
 
     try:
         while True:
-            data = await reader.read(1)
-            if data is None:
-                break
+            if use_readinto:
+                bytes_read = await reader.readinto(chunk)
+                data = chunk
             else:
-                if len(data) == 1:
-                    b = data[0]
-                    if b == ord('A'):  # commands always start with A, so reset the buffer.
-                        buffer = [b]
-                    else:
-                        if len(buffer) < 8:  # anti-gibberish test
-                            buffer.append(b)
-                            if b == ord(';') or b == 13:  # command terminator
-                                command = ''.join(map(chr, buffer))
-                                if command in ('AI1;', 'AI1\r'):  # get direction
-                                    bearing = await rotator.get_rotator_bearing()
-                                    response = f';{bearing:03n}'
-                                    writer.write(response.encode('UTF-8'))
-                                    await writer.drain()
-                                elif command.startswith('AP1') and command[-1] == '\r':  # set bearing and move rotator
-                                    requested = safe_int(command[3:-1], -1)
-                                    if 0 <= requested <= 360:
-                                        await rotator.set_rotator_bearing(requested)
-                                elif command.startswith('AP1') and command[-1] == ';':  # set bearing
-                                    requested = safe_int(command[3:-1], -1)
-                                elif command == 'AM1;' and 0 <= requested <= 360:  # move rotator
-                                    await rotator.set_rotator_bearing(requested)
+                data = await reader.read(_SERIAL_CHUNK_SIZE)
+                bytes_read = len(data) if data is not None else 0
+            if not bytes_read:
+                break
+            set_activity('main:serve_serial_client')
+            for i in range(bytes_read):
+                b = data[i]
+                if b == _CMD_START:  # commands always start with A, so reset the buffer.
+                    command[0] = b
+                    command_length = 1
+                elif command_length == 0:  # gibberish between commands
+                    continue
+                elif command_length >= _SERIAL_COMMAND_SIZE:  # anti-gibberish test
+                    command_length = 0
+                else:
+                    command[command_length] = b
+                    command_length += 1
+                    if b == _CMD_SEMICOLON or b == _CMD_CR:  # command terminator
+                        n = command_length
+                        command_length = 0
+                        if n < 4:
+                            continue
+                        index = command[2] - _CMD_ONE
+                        if _match(command, CMD_PUSH):  # unsolicited bearing updates, AU0; turns them off
+                            if push_task is not None:
+                                push_task.cancel()
+                                push_task = None
+                            if 0 <= index < len(rotor_list):
+                                push_task = asyncio.create_task(push_bearing_changes(writer, rotor_list[index]))
+                            continue
+                        if index < 0 or index >= len(rotor_list):  # no such rotator
+                            continue
+                        r = rotor_list[index]
+                        if n == 4 and _match(command, CMD_GET_BEARING):  # get direction
+                            bearing = await r.get_cached_bearing()
+                            if bearing >= 0:
+                                write_degrees(reply, 1, bearing)
+                                writer.write(reply)
+                            else:
+                                writer.write(b';%03d' % bearing)
+                            await writer.drain()
+                        elif _match(command, CMD_SET_BEARING):
+                            tenths = parse_tenths(command, 3, n - 1)
+                            requested[index] = -1 if tenths is None else tenths
+                            if b == _CMD_CR and 0 <= requested[index] <= FULL_CIRCLE:  # set bearing and move rotator
+                                await r.set_rotator_bearing(requested[index])
+                            # else ';' just sets the bearing, AM1; moves.
+                        elif n == 4 and b == _CMD_SEMICOLON and _match(command, CMD_MOVE) and \
+                                0 <= requested[index] <= FULL_CIRCLE:  # move rotator
+                            await r.set_rotator_bearing(requested[index])
+        if push_task is not None:
+            push_task.cancel()
+            push_task = None
         writer.close()
         await writer.wait_closed()
         gc.collect()
 
     except Exception as exc:
         logging.exception('exception in serve_serial_client:', 'main:serve_serial_client', exc_info=exc)
+    if push_task is not None:
+        push_task.cancel()
     tc = milliseconds()
-    logging.info(f'serial client disconnected, elapsed time {(tc - t0) / 1000.0:6.3f} seconds',
-                 'main:serve_serial_client')
+    logging.info('serial client disconnected, elapsed time %6.3f seconds', 'main:serve_serial_client',
+                 (tc - t0) / 1000.0)
 
 
 # noinspection PyUnusedLocal
@@ -166,98 +321,143 @@ async def slash_callback(http, verb, args, reader, writer, request_headers=None)
 @http_server.route(b'/api/config')
 async def api_config_callback(http, verb, args, reader, writer, request_headers=None):  # callback for '/api/config'
     if verb == HTTP_VERB_GET:
-        payload = read_config()
         # payload.pop('secret')  # do not return the secret
-        response = json.dumps(payload).encode('utf-8')
+        response = config_store.get_json()
         http_status = 200
         bytes_sent = await http.send_simple_response(writer, http_status, http.CT_APP_JSON, response)
     elif verb == HTTP_VERB_POST:
-        config = read_config()
-        dirty = False
+        changes = {}
         errors = False
         tcp_port = args.get('tcp_port')
         if tcp_port is not None:
             tcp_port_int = safe_int(tcp_port, -2)
             if 0 <= tcp_port_int <= 65535:
-                config['tcp_port'] = tcp_port
-                dirty = True
+                changes['tcp_port'] = tcp_port
             else:
                 errors = True
         web_port = args.get('web_port')
         if web_port is not None:
             web_port_int = safe_int(web_port, -2)
             if 0 <= web_port_int <= 65535:
-                config['web_port'] = web_port
-                dirty = True
+                changes['web_port'] = web_port
+            else:
+                errors = True
+        rotctld_port = args.get('rotctld_port')
+        if rotctld_port is not None:
+            rotctld_port_int = safe_int(rotctld_port, -2)
+            if 0 <= rotctld_port_int <= 65535:
+                changes['rotctld_port'] = rotctld_port
             else:
                 errors = True
         ssid = args.get('SSID')
         if ssid is not None:
             if 0 < len(ssid) < 64:
-                config['SSID'] = ssid
-                dirty = True
+                changes['SSID'] = ssid
             else:
                 errors = True
         secret = args.get('secret')
         if secret is not None:
             if 8 <= len(secret) < 32:
-                config['secret'] = secret
-                dirty = True
+                changes['secret'] = secret
             else:
                 errors = True
         remote_username = args.get('username')
         if remote_username is not None:
             if 1 <= len(remote_username) <= 16:
-                config['username'] = remote_username
-                dirty = True
+                changes['username'] = remote_username
             else:
                 errors = True
         remote_password = args.get('password')
         if remote_password is not None:
             if 1 <= len(remote_password) <= 16:
-                config['password'] = remote_password
-                dirty = True
+                changes['password'] = remote_password
             else:
                 errors = True
         ap_mode_arg = args.get('ap_mode')
         if ap_mode_arg is not None:
             ap_mode = ap_mode_arg == '1'
-            config['ap_mode'] = ap_mode
-            dirty = True
+            changes['ap_mode'] = ap_mode
         n1mm_arg = args.get('n1mm')
         if n1mm_arg is not None:
             n1mm = n1mm_arg == 1
-            config['n1mm'] = n1mm
-            dirty = True
+            changes['n1mm'] = n1mm
         dhcp_arg = args.get('dhcp')
         if dhcp_arg is not None:
             dhcp = dhcp_arg == 1
-            config['dhcp'] = dhcp
-            dirty = True
+            changes['dhcp'] = dhcp
+        rotors = args.get('rotors')
+        if rotors is not None:
+            if valid_rotors(rotors):
+                changes['rotors'] = rotors  # takes effect after a restart
+            else:
+                errors = True
+        n1mm_targets = args.get('n1mm_targets')
+        if n1mm_targets is not None:
+            try:
+                n1mm_udp.parse_targets(n1mm_targets, N1MM_BROADCAST_FROM_ROTOR_PORT)
+                changes['n1mm_targets'] = n1mm_targets
+            except ValueError:
+                errors = True
+        grid = args.get('grid')
+        if grid is not None:
+            if valid_grid(grid):
+                changes['grid'] = grid.upper()
+            else:
+                errors = True
+        beamwidth = args.get('beamwidth')
+        if beamwidth is not None:
+            beamwidth_int = safe_int(beamwidth, -1)
+            if 1 <= beamwidth_int <= 180:
+                changes['beamwidth'] = beamwidth_int
+            else:
+                errors = True
+        syslog = args.get('syslog')
+        if syslog is not None:
+            try:
+                if syslog:
+                    syslog_udp.parse_target(syslog)
+                changes['syslog'] = syslog  # empty to stop sending
+            except ValueError:
+                errors = True
+        syslog_format = args.get('syslog_format')
+        if syslog_format is not None:
+            if syslog_format in syslog_udp.FORMATS:
+                changes['syslog_format'] = syslog_format
+            else:
+                errors = True
+        profile_arg = args.get('profile')
+        if profile_arg is not None:
+            changes['profile'] = profile_arg in (1, '1', True)  # takes effect after a restart
+        log_print_arg = args.get('log_print')
+        if log_print_arg is not None:
+            log_print = log_print_arg in (1, '1', True)
+            changes['log_print'] = log_print
+            logging.set_print(log_print)
         hostname = args.get('hostname')
         if hostname is not None:
-            config['hostname'] = hostname
-            dirty = True
+            changes['hostname'] = hostname
         ip_address = args.get('ip_address')
         if ip_address is not None:
-            config['ip_address'] = ip_address
-            dirty = True
+            changes['ip_address'] = ip_address
         netmask = args.get('netmask')
         if netmask is not None:
-            config['netmask'] = netmask
-            dirty = True
+            changes['netmask'] = netmask
         gateway = args.get('gateway')
         if gateway is not None:
-            config['gateway'] = gateway
-            dirty = True
+            changes['gateway'] = gateway
         dns_server = args.get('dns_server')
         if dns_server is not None:
-            config['dns_server'] = dns_server
-            dirty = True
+            changes['dns_server'] = dns_server
         if not errors:
-            if dirty:
-                save_config(config)
-            response = b'ok\r\n'
+            if changes:
+                save_config(changes)
+                elapsed = await service_manager.apply_config(read_config())
+            else:
+                elapsed = -1
+            if elapsed >= 0:
+                response = b'ok, services reconfigured in %d ms\r\n' % elapsed
+            else:
+                response = b'ok\r\n'
             http_status = 200
             bytes_sent = await http.send_simple_response(writer, http_status, http.CT_TEXT_TEXT, response)
         else:
@@ -287,18 +487,109 @@ async def api_restart_callback(http, verb, args, reader, writer, request_headers
     return bytes_sent, http_status
 
 
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/log')
+async def api_log_callback(http, verb, args, reader, writer, request_headers=None):
+    if args.get('syslog'):
+        sender = service_manager.syslog_sender if service_manager is not None else None
+        response = sender.status() if sender is not None else {}
+        bytes_sent = await http.send_simple_response(writer, 200, http.CT_APP_JSON, response)
+        return bytes_sent, 200
+    # no content-length, the lines are taken from the ring after the headers are sent.
+    await http.start_response(writer, 200, http.CT_TEXT_TEXT)
+    older, newer = logging.ring_contents()
+    writer.write(older)
+    writer.write(newer)
+    await writer.drain()
+    return len(older) + len(newer), 200
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/heap')
+async def api_heap_callback(http, verb, args, reader, writer, request_headers=None):
+    """
+    /api/heap reports the free heap.  /api/heap?probe=1 also finds the largest free block, which stalls
+    the other tasks for a moment.
+    """
+    if args.get('probe'):
+        heap_monitor.probe()
+    bytes_sent = await http.send_simple_response(writer, 200, http.CT_APP_JSON, heap_monitor.status())
+    return bytes_sent, 200
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/stalls')
+async def api_stalls_callback(http, verb, args, reader, writer, request_headers=None):
+    bytes_sent = await http.send_simple_response(writer, 200, http.CT_APP_JSON, loop_monitor.status())
+    return bytes_sent, 200
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/profile')
+async def api_profile_callback(http, verb, args, reader, writer, request_headers=None):
+    if args.get('reset'):
+        profile_reset()
+    response = {'enabled': utils.profiling, 'functions': profile_report()}
+    bytes_sent = await http.send_simple_response(writer, 200, http.CT_APP_JSON, response)
+    return bytes_sent, 200
+
+
+def station_location():
+    """
+    :return: (latitude, longitude) of the station's grid square, or None if the grid is not configured
+    """
+    grid = read_config().get('grid')
+    return grid_to_lat_lon(grid) if valid_grid(grid) else None
+
+
+def target_location(target, is_grid):
+    """
+    :return: (latitude, longitude) of a grid square or callsign prefix, or None if it is unknown
+    """
+    if is_grid:
+        return grid_to_lat_lon(target) if valid_grid(target) else None
+    return prefix_table.lookup(target)
+
+
+def unescape_targets(targets):
+    # the http server does not url-decode arguments, and browsers escape ',' and '/'.
+    return targets.replace('%2C', ',').replace('%2c', ',').replace('%2F', '/').replace('%2f', '/')
+
+
 # rotator web actions
 # noinspection PyUnusedLocal
 @http_server.route(b'/api/bearing')
 async def api_bearing_callback(http, verb, args, reader, writer, request_headers=None):
     requested_bearing = args.get('set')
-    if requested_bearing:
+    grid = args.get('grid')
+    prefix = args.get('prefix')
+    r = get_rotator(args.get('rotor'))
+    if r is None:
+        http_status = 404
+        response = b'no such rotor\r\n'
+        bytes_sent = await http.send_simple_response(writer, http_status, http.CT_TEXT_TEXT, response)
+    elif grid or prefix:
+        station = station_location()
+        location = target_location(grid, True) if grid else target_location(unescape_targets(prefix), False)
+        if station is None:
+            http_status = 400
+            response = b'station grid not set\r\n'
+        elif location is None:
+            http_status = 400
+            response = b'unknown grid or prefix\r\n'
+        else:
+            azimuth, _ = azimuth_and_distance(station[0], station[1], location[0], location[1])
+            bearing = await r.set_rotator_bearing(r.plan_bearing(azimuth))
+            http_status = 200
+            response = format_bearing(bearing) + b'\r\n'
+        bytes_sent = await http.send_simple_response(writer, http_status, http.CT_TEXT_TEXT, response)
+    elif requested_bearing:
         try:
-            requested_bearing = int(requested_bearing)
-            if 0 <= requested_bearing <= 360:
-                bearing = await rotator.set_rotator_bearing(requested_bearing)
+            requested_bearing = parse_tenths(requested_bearing.encode('utf-8'))
+            if requested_bearing is not None and 0 <= requested_bearing <= FULL_CIRCLE:
+                bearing = await r.set_rotator_bearing(requested_bearing)
                 http_status = 200
-                response = f'{bearing}\r\n'.encode('utf-8')
+                response = format_bearing(bearing) + b'\r\n'
                 bytes_sent = await http.send_simple_response(writer, http_status, http.CT_TEXT_TEXT, response)
             else:
                 http_status = 400
@@ -309,36 +600,751 @@ async def api_bearing_callback(http, verb, args, reader, writer, request_headers
             response = f'uh oh: {ex}'.encode('utf-8')
             bytes_sent = await http.send_simple_response(writer, http_status, http.CT_TEXT_TEXT, response)
     else:
-        bearing = await rotator.get_rotator_bearing()
+        bearing = await r.get_rotator_bearing()
         http_status = 200
-        response = f'{bearing}\r\n'.encode('utf-8')
+        response = format_bearing(bearing) + b'\r\n'
         bytes_sent = await http.send_simple_response(writer, http_status, http.CT_TEXT_TEXT, response)
     return bytes_sent, http_status
 
 
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/azimuths')
+async def api_azimuths_callback(http, verb, args, reader, writer, request_headers=None):
+    """
+    score many targets at once without moving the rotator.
+    /api/azimuths?targets=FN42,JA1ABC,VK returns the azimuth, distance and rotation time to each.
+    """
+    targets = args.get('targets')
+    r = get_rotator(args.get('rotor'))
+    station = station_location()
+    if r is None:
+        http_status = 404
+        payload = b'no such rotor\r\n'
+    elif station is None:
+        http_status = 400
+        payload = b'station grid not set\r\n'
+    elif not targets:
+        http_status = 400
+        payload = b'no targets\r\n'
+    else:
+        payload = []
+        for target in unescape_targets(targets).split(',')[:MAX_BATCH_TARGETS]:
+            # a two letter field looks just like a prefix, so only squares count as grids here.
+            location = target_location(target, len(target) >= 4 and valid_grid(target))
+            if location is None:
+                payload.append({'target': target, 'error': 'unknown'})
+                continue
+            azimuth, distance = azimuth_and_distance(station[0], station[1], location[0], location[1])
+            result = {'target': target, 'azimuth': azimuth / 10, 'distance_km': distance}
+            if r.last_bearing >= 0:
+                result['travel_s'] = int(travel_time(r.last_bearing, r.plan_bearing(azimuth)) + 0.5)
+            payload.append(result)
+        http_status = 200
+    content_type = http.CT_APP_JSON if http_status == 200 else http.CT_TEXT_TEXT
+    bytes_sent = await http.send_simple_response(writer, http_status, content_type, payload)
+    return bytes_sent, http_status
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/rotors')
+async def api_rotors_callback(http, verb, args, reader, writer, request_headers=None):
+    payload = [{'name': r.name, 'number': i + 1, 'bearing': to_degrees(r.last_bearing)}
+               for i, r in enumerate(rotor_list)]
+    http_status = 200
+    bytes_sent = await http.send_simple_response(writer, http_status, http.CT_APP_JSON, payload)
+    return bytes_sent, http_status
+
+
+def get_port(config, key, default):
+    port = safe_int(config.get(key) or default, default)
+    if port < 0 or port > 65535:
+        port = default
+    return port
+
+
+def clock_is_set():
+    # the Pico-W clock starts in 2021 until NTP sets it.
+    return time.gmtime()[0] >= 2024
+
+
+class Tracker:
+    """
+    follows the sun or moon with one rotator.
+
+    positions are computed TRACK_TABLE_STEP seconds apart into a small table, and interpolated between,
+    so the trig runs once every couple of minutes instead of on every check.  the rotator is only moved
+    when the pointing error is more than the antenna beamwidth, which keeps the serial traffic down.
+    """
+
+    def __init__(self):
+        self.body = None
+        self.rotator = None
+        self.latitude = 0.0
+        self.longitude = 0.0
+        self.beamwidth = from_degrees(DEFAULT_BEAMWIDTH)
+        self.azimuths = array('h', [0] * TRACK_TABLE_SIZE)  # tenths of degrees
+        self.elevations = array('h', [0] * TRACK_TABLE_SIZE)
+        self.table_start = 0  # time.time() of the first table entry
+        self.table_count = 0
+        self.azimuth = -1
+        self.elevation = 0
+        self.error = -1
+        self.moves = 0
+        self.state = 'off'
+        self.task = None
+
+    def start(self, body, r, location, beamwidth):
+        self.stop()
+        self.body = body
+        self.rotator = r
+        self.latitude, self.longitude = location
+        self.beamwidth = from_degrees(beamwidth)
+        self.table_count = 0
+        self.azimuth = -1
+        self.error = -1
+        self.moves = 0
+        self.state = 'starting'
+        self.task = asyncio.create_task(self.run())
+        logging.info('tracking the %s with rotor "%s"', 'main:Tracker:start', body, r.name)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+            logging.info('stopped tracking the %s', 'main:Tracker:stop', self.body)
+        self.body = None
+        self.rotator = None
+        self.state = 'off'
+
+    async def fill_table(self, start):
+        for i in range(TRACK_TABLE_SIZE):
+            if i & 7 == 0:  # other tasks may have run at the last sleep.
+                set_activity('main:Tracker:fill_table')
+            self.azimuths[i], self.elevations[i] = ephemeris.position(self.body, self.latitude, self.longitude,
+                                                                      start + i * TRACK_TABLE_STEP)
+            if i & 7 == 7:
+                await asyncio.sleep(0)  # let the other tasks run while the table is filled.
+        self.table_start = start
+        self.table_count = TRACK_TABLE_SIZE
+        logging.debug('computed %d %s positions', 'main:Tracker:fill_table', TRACK_TABLE_SIZE, self.body)
+
+    async def lookup(self, now):
+        """
+        interpolate the position at time now, refilling the table when now runs off its end.
+        :return: (azimuth, elevation) in tenths of degrees
+        """
+        offset = now - self.table_start
+        if self.table_count == 0 or offset < 0 or offset >= (self.table_count - 1) * TRACK_TABLE_STEP:
+            await self.fill_table(now)
+            offset = 0
+        i = offset // TRACK_TABLE_STEP
+        fraction = offset % TRACK_TABLE_STEP
+        az0 = self.azimuths[i]
+        az_change = (self.azimuths[i + 1] - az0 + FULL_CIRCLE + FULL_CIRCLE // 2) % FULL_CIRCLE - FULL_CIRCLE // 2
+        azimuth = (az0 + az_change * fraction // TRACK_TABLE_STEP) % FULL_CIRCLE
+        el0 = self.elevations[i]
+        elevation = el0 + (self.elevations[i + 1] - el0) * fraction // TRACK_TABLE_STEP
+        return azimuth, elevation
+
+    async def run(self):
+        r = self.rotator
+        try:
+            while True:
+                try:
+                    if not clock_is_set():
+                        self.state = 'waiting for clock'
+                    else:
+                        self.azimuth, self.elevation = await self.lookup(int(time.time()))
+                        if self.elevation < 0:
+                            self.state = 'below horizon'
+                        else:
+                            self.state = 'tracking'
+                            bearing = await r.get_cached_bearing()
+                            if bearing >= 0:
+                                self.error = abs(angle_difference(bearing, self.azimuth))
+                                if self.error > self.beamwidth:
+                                    await r.set_rotator_bearing(r.plan_bearing(self.azimuth))
+                                    self.moves += 1
+                except Exception as exc:  # CancelledError is not an Exception.  try again at the next check.
+                    self.state = 'error'
+                    logging.exception('tracking the %s failed', 'main:Tracker:run', self.body, exc_info=exc)
+                await asyncio.sleep(TRACK_INTERVAL)
+        except asyncio.CancelledError:
+            pass
+
+    def status(self):
+        return {
+            'body': self.body,
+            'rotor': self.rotator.name if self.rotator is not None else None,
+            'state': self.state,
+            'azimuth': to_decimal_degrees(self.azimuth),
+            'elevation': self.elevation / 10,
+            'error': to_decimal_degrees(self.error),
+            'beamwidth': self.beamwidth // 10,
+            'moves': self.moves,
+        }
+
+
+tracker = Tracker()
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/track')
+async def api_track_callback(http, verb, args, reader, writer, request_headers=None):
+    """
+    /api/track?body=moon starts following the moon, body=sun the sun, body=off stops.
+    with no body the tracking status is returned.
+    """
+    body = args.get('body')
+    r = get_rotator(args.get('rotor'))
+    payload = None
+    http_status = 200
+    if body == 'off':
+        tracker.stop()
+    elif body is not None:
+        location = station_location()
+        if body not in ephemeris.BODIES:
+            http_status = 400
+            payload = b'body must be sun, moon or off\r\n'
+        elif r is None:
+            http_status = 404
+            payload = b'no such rotor\r\n'
+        elif location is None:
+            http_status = 400
+            payload = b'station grid not set\r\n'
+        else:
+            beamwidth = safe_int(read_config().get('beamwidth', DEFAULT_BEAMWIDTH), DEFAULT_BEAMWIDTH)
+            stop_automatic_steering()
+            tracker.start(body, r, location, beamwidth)
+    if payload is None:
+        payload = tracker.status()
+        content_type = http.CT_APP_JSON
+    else:
+        content_type = http.CT_TEXT_TEXT
+    bytes_sent = await http.send_simple_response(writer, http_status, content_type, payload)
+    return bytes_sent, http_status
+
+
+trajectory = Trajectory()
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/trajectory')
+async def api_trajectory_callback(http, verb, args, reader, writer, request_headers=None):
+    """
+    POST a trajectory as text/plain lines of 'utc_seconds azimuth' to /api/trajectory?rotor=name,
+    or as JSON {"rotor": "name", "points": [[utc, az], ...]}.
+    it replaces any running trajectory and starts at once.
+    GET reports progress and the per-point pointing errors, GET ?stop=1 stops it.
+    """
+    http_status = 200
+    payload = None
+    if verb == HTTP_VERB_POST:
+        if not isinstance(args, dict):  # a JSON list
+            args = {}
+        trajectory.clear()
+        ok = True
+        content_type = request_headers.get(b'Content-Type', b'') if request_headers else b''
+        if content_type.startswith(http.CT_TEXT_TEXT):  # the http server leaves text bodies for the callback.
+            remaining = safe_int(request_headers.get(b'Content-Length') or '0', 0)
+            while remaining > 0:
+                line = await reader.readline()
+                if not line:
+                    break
+                remaining -= len(line)
+                if ok and not trajectory.parse_line(line):
+                    ok = False  # keep reading so the connection stays in step.
+        else:  # JSON, already read and parsed by the http server
+            points = args.get('points')
+            try:
+                for point in points:
+                    if not trajectory.add_point(int(point[0]), int(point[1] * 10 + 0.5)):
+                        ok = False
+                        break
+            except (TypeError, ValueError, IndexError):  # no points, or a bad one
+                ok = False
+        r = get_rotator(args.get('rotor'))
+        if not ok or trajectory.count == 0:
+            trajectory.clear()
+            http_status = 400
+            payload = b'bad trajectory point, or more than %d points\r\n' % MAX_TRAJECTORY_POINTS
+        elif r is None:
+            trajectory.clear()
+            http_status = 404
+            payload = b'no such rotor\r\n'
+        else:
+            stop_automatic_steering()
+            trajectory.start(r)
+            payload = b'ok, %d points\r\n' % trajectory.count
+    elif args.get('stop'):
+        trajectory.stop()
+    if payload is None:
+        payload = trajectory.status()
+        content_type = http.CT_APP_JSON
+    else:
+        content_type = http.CT_TEXT_TEXT
+    bytes_sent = await http.send_simple_response(writer, http_status, content_type, payload)
+    return bytes_sent, http_status
+
+
+scanner = Scanner()
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/scan')
+async def api_scan_callback(http, verb, args, reader, writer, request_headers=None):
+    """
+    /api/scan?bearings=0,45,90&dwell=30 or /api/scan?start=0&end=330&step=30&dwell=30 starts a scan,
+    add repeat=1 to go around again and again.  /api/scan?stop=1 stops.  /api/scan reports progress.
+    """
+    http_status = 200
+    payload = None
+    bearings = args.get('bearings')
+    start = args.get('start')
+    if args.get('stop'):
+        scanner.stop()
+    elif bearings is not None or start is not None:
+        r = get_rotator(args.get('rotor'))
+        dwell = safe_int(args.get('dwell'), -1)
+        if bearings is not None:
+            values = [parse_tenths(b.encode('utf-8')) for b in unescape_targets(bearings).split(',')]
+        else:
+            values = [parse_tenths(v.encode('utf-8')) if v else None
+                      for v in (start, args.get('end'), args.get('step'))]
+            values = None if None in values else range_bearings(values[0], values[1], values[2])
+        if r is None:
+            http_status = 404
+            payload = b'no such rotor\r\n'
+        elif values is None or not Scanner.valid_bearings(values) or not 0 <= dwell <= 3600:
+            http_status = 400
+            payload = b'bad bearings, range or dwell\r\n'
+        else:
+            stop_automatic_steering()
+            scanner.start(r, values, dwell, args.get('repeat') == '1')
+    if payload is None:
+        payload = scanner.status()
+        content_type = http.CT_APP_JSON
+    else:
+        content_type = http.CT_TEXT_TEXT
+    bytes_sent = await http.send_simple_response(writer, http_status, content_type, payload)
+    return bytes_sent, http_status
+
+
+def stop_automatic_steering():
+    # only one thing at a time steers the rotator.
+    tracker.stop()
+    trajectory.stop()
+    scanner.stop()
+
+
+def set_clock():
+    """
+    set the clock by NTP.  ntptime blocks for up to a second, so this is only called from keep_clock_set.
+    :return: True if the clock was set
+    """
+    try:
+        import ntptime
+        set_activity('main:set_clock')
+        ntptime.settime()
+        logging.info('clock set by NTP, %s', 'main:set_clock', get_timestamp())
+        return True
+    except Exception as exc:
+        logging.exception('cannot set the clock', 'main:set_clock', exc_info=exc)
+        return False
+
+
+async def keep_clock_set():
+    # the tracker needs UTC.  retry with a growing delay until NTP answers, then keep the clock from drifting.
+    retry = CLOCK_RETRY_MIN
+    try:
+        while True:
+            if set_clock():
+                retry = CLOCK_RETRY_MIN
+                await asyncio.sleep(CLOCK_RESYNC_INTERVAL)
+            else:
+                await asyncio.sleep(retry)
+                retry = min(retry * 2, CLOCK_RETRY_MAX)
+    except asyncio.CancelledError:
+        pass
+
+
+def _rotor_collector(attribute):
+    def collect(out, metric):
+        for r in rotor_list:
+            out.sample(metric.name, getattr(r, attribute), (b'rotor',), (r.name,))
+    return collect
+
+
+def _collect_bearings(out, metric):
+    for r in rotor_list:
+        if r.last_bearing >= 0:  # not an error code
+            out.sample(metric.name, r.last_bearing, (b'rotor',), (r.name,))
+
+
+def _collect_n1mm_sent(out, metric):
+    sender = service_manager.n1mm_sender if service_manager is not None else None
+    if sender is not None:
+        for destination in sender.destinations:
+            out.sample(metric.name, destination.sent, (b'host',), (destination.host,))
+
+
+def _n1mm_received():
+    receiver = service_manager.n1mm_receiver if service_manager is not None else None
+    return receiver.datagrams_received if receiver is not None else None
+
+
+def _wifi_rssi():
+    network = service_manager.picow_network if service_manager is not None else None
+    return network.rssi() if network is not None else None
+
+
+def _wifi_connects():
+    network = service_manager.picow_network if service_manager is not None else None
+    return network.connects if network is not None else None
+
+
+def _collect_loop_max_lag(out, metric):
+    out.write(metric.name)
+    out.write(b' ')
+    out.write_millis(loop_monitor.max_lag_ms)
+    out.write(b'\n')
+
+
+registry.collector('rotator_serial_transactions_total', COUNTER, 'Serial commands sent to the rotator controller.',
+                   _rotor_collector('transactions'))
+registry.collector('rotator_serial_no_replies_total', COUNTER, 'Bearing queries the controller did not answer.',
+                   _rotor_collector('no_replies'))
+registry.collector('rotator_serial_bad_replies_total', COUNTER, 'Bearing queries answered with unexpected data.',
+                   _rotor_collector('bad_replies'))
+registry.collector('rotator_serial_busy_total', COUNTER, 'Serial commands refused because the port was busy.',
+                   _rotor_collector('busy'))
+registry.collector('rotator_bearing_tenths', GAUGE, 'Last good bearing read from the controller, tenths of a degree.',
+                   _collect_bearings)
+registry.counter('rotator_n1mm_datagrams_received_total', 'N1MM rotor datagrams received.', _n1mm_received)
+registry.collector('rotator_n1mm_datagrams_sent_total', COUNTER, 'N1MM position datagrams sent, by destination.',
+                   _collect_n1mm_sent)
+registry.gauge('rotator_wifi_rssi_dbm', 'Wi-Fi signal strength.', _wifi_rssi)
+registry.counter('rotator_wifi_connects_total', 'Wi-Fi connections made, more than one is a reconnect.',
+                 _wifi_connects)
+registry.gauge('rotator_heap_free_bytes', 'Free heap.', lambda: heap_monitor.free)
+registry.gauge('rotator_heap_free_min_bytes', 'Lowest free heap seen.', lambda: heap_monitor.free_min)
+registry.gauge('rotator_heap_largest_block_bytes', 'Largest allocatable heap block, at the last probe.',
+               lambda: heap_monitor.largest_block if heap_monitor.largest_block >= 0 else None)
+registry.counter('rotator_loop_stalls_total', 'Event loop stalls of 100 ms or more.', lambda: loop_monitor.stalls)
+registry.collector('rotator_loop_max_lag_seconds', GAUGE, 'Longest event loop stall.', _collect_loop_max_lag)
+registry.gauge('rotator_uptime_seconds', 'Seconds since start.', uptime_seconds)
+
+
+def get_syslog_settings(config):
+    """
+    :return: (target, format, hostname) for the syslog server, or None if logs are not sent to one
+    """
+    target = config.get('syslog')
+    if not target:
+        return None
+    return target, config.get('syslog_format', syslog_udp.RFC5424), config.get('hostname')
+
+
+class ServiceManager:
+    """
+    starts, stops, and restarts the network services so that configuration changes
+    can be applied without a soft reset and a Wi-Fi rejoin.
+    """
+
+    def __init__(self, picow_network=None):
+        self.picow_network = picow_network
+        self.ip_address = None
+        self.netmask = None
+        self.ap_mode = False
+        self.started = False
+        self.web_port = None
+        self.web_server = None
+        self.web_restart_task = None
+        self.tcp_port = None
+        self.tcp_server = None
+        self.rotctld_port = None
+        self.rotctld_servers = []
+        self.n1mm_name = None
+        self.n1mm_targets = None
+        self.n1mm_sender = None
+        self.n1mm_receiver = None
+        self.n1mm_sender_task = None
+        self.n1mm_receiver_task = None
+        self.syslog_settings = None
+        self.syslog_sender = None
+        self.syslog_task = None
+        self.clock_task = None
+        self.last_reconfigure_ms = -1
+
+    async def start_web(self, web_port):
+        self.web_server = await self.open_web(web_port)
+        if self.web_server is not None:
+            self.web_port = web_port
+
+    @staticmethod
+    async def open_web(web_port):
+        logging.info('Starting web service on port %d', 'main:ServiceManager:open_web', web_port)
+        try:
+            return await asyncio.start_server(http_server.serve_http_client, '0.0.0.0', web_port)
+        except Exception as exc:
+            logging.exception('cannot start web service on port %s', 'main:ServiceManager:open_web', web_port,
+                              exc_info=exc)
+            return None
+
+    async def stop_web(self):
+        if self.web_server is not None:
+            logging.info('Stopping web service on port %s', 'main:ServiceManager:stop_web', self.web_port)
+            self.web_server.close()
+            await self.web_server.wait_closed()
+            self.web_server = None
+        self.web_port = None
+
+    async def restart_web(self):
+        # apply_config sets self.web_port before this runs, and may set it again while it runs,
+        # so go round until the server is listening on the newest port.
+        web_port = None
+        while web_port != self.web_port:
+            web_port = self.web_port
+            server = self.web_server
+            self.web_server = None
+            if server is not None:
+                logging.info('Stopping web service', 'main:ServiceManager:restart_web')
+                server.close()
+                await server.wait_closed()
+            self.web_server = await self.open_web(web_port)
+            if self.web_server is None:
+                self.web_port = None  # so the next configuration change tries again.
+                break
+
+    async def start_tcp(self, tcp_port):
+        logging.info('Starting tcp service on port %d', 'main:ServiceManager:start_tcp', tcp_port)
+        try:
+            self.tcp_server = await asyncio.start_server(serve_serial_client, '0.0.0.0', tcp_port)
+            self.tcp_port = tcp_port
+        except Exception as exc:
+            logging.exception('cannot start tcp service on port %s', 'main:ServiceManager:start_tcp', tcp_port,
+                              exc_info=exc)
+
+    async def stop_tcp(self):
+        if self.tcp_server is not None:
+            logging.info('Stopping tcp service on port %s', 'main:ServiceManager:stop_tcp', self.tcp_port)
+            self.tcp_server.close()
+            await self.tcp_server.wait_closed()
+            self.tcp_server = None
+        self.tcp_port = None
+
+    async def start_rotctld(self, rotctld_port):
+        """
+        start a rotctld listener for each rotor, on consecutive ports.
+        """
+        self.rotctld_port = rotctld_port
+        if rotctld_port == 0:  # disabled
+            return
+        for i, r in enumerate(rotor_list):
+            port = rotctld_port + i
+            logging.info('Starting rotctld service for "%s" on port %d', 'main:ServiceManager:start_rotctld', r.name,
+                         port)
+            try:
+                rotctld = RotctldServer(r)
+                self.rotctld_servers.append(await asyncio.start_server(rotctld.serve_rotctld_client, '0.0.0.0', port))
+            except Exception as exc:
+                logging.exception('cannot start rotctld service on port %s', 'main:ServiceManager:start_rotctld', port,
+                                  exc_info=exc)
+
+    async def stop_rotctld(self):
+        if self.rotctld_servers:
+            logging.info('Stopping rotctld services on port %s', 'main:ServiceManager:stop_rotctld', self.rotctld_port)
+        for server in self.rotctld_servers:
+            server.close()
+            await server.wait_closed()
+        self.rotctld_servers = []
+        self.rotctld_port = None
+
+    def start_n1mm(self, hostname, targets=None):
+        ip_address = self.ip_address
+        netmask = self.netmask
+        logging.info('configuring N1MM Mode with ip address %s net mask %s', 'main:ServiceManager:start_n1mm',
+                     ip_address, netmask)
+        broadcast_address = n1mm_udp.calculate_broadcast_address(ip_address, netmask)
+        logging.info('Broadcast address (to N1MM) is %s', 'main:ServiceManager:start_n1mm', broadcast_address)
+        logging.info('Starting rotor position broadcasts for N1MM on port %s', 'main:ServiceManager:start_n1mm',
+                     N1MM_BROADCAST_FROM_ROTOR_PORT)
+        try:
+            extra_targets = n1mm_udp.parse_targets(targets, N1MM_BROADCAST_FROM_ROTOR_PORT)
+        except ValueError:
+            logging.error('bad n1mm_targets "%s"', 'main:ServiceManager:start_n1mm', targets)
+            extra_targets = []
+        if extra_targets:
+            logging.info('Also sending N1MM rotor positions to %s', 'main:ServiceManager:start_n1mm', extra_targets)
+        self.n1mm_sender = n1mm_udp.SendBroadcastFromN1MM(broadcast_address,
+                                                          target_port=N1MM_BROADCAST_FROM_ROTOR_PORT,
+                                                          extra_targets=extra_targets,
+                                                          rotators=rotor_list)
+        logging.info('Starting listener for UDP position broadcasts from N1MM on port %s',
+                     'main:ServiceManager:start_n1mm', N1MM_ROTOR_BROADCAST_PORT)
+        self.n1mm_receiver = n1mm_udp.ReceiveBroadcastsFromN1MM(ip_address,
+                                                                receive_port=N1MM_ROTOR_BROADCAST_PORT,
+                                                                rotators=rotor_list)
+        self.n1mm_sender_task = asyncio.create_task(self.n1mm_sender.send_datagrams())
+        self.n1mm_receiver_task = asyncio.create_task(self.n1mm_receiver.wait_for_datagram())
+        self.n1mm_name = hostname
+        self.n1mm_targets = targets
+
+    def stop_n1mm(self):
+        if self.n1mm_sender is not None:
+            logging.info('Stopping N1MM services', 'main:ServiceManager:stop_n1mm')
+            self.n1mm_sender.stop()
+            self.n1mm_sender_task.cancel()
+            self.n1mm_sender.close()
+            self.n1mm_sender = None
+            self.n1mm_sender_task = None
+        if self.n1mm_receiver is not None:
+            self.n1mm_receiver.stop()
+            self.n1mm_receiver_task.cancel()
+            self.n1mm_receiver.close()
+            self.n1mm_receiver = None
+            self.n1mm_receiver_task = None
+        self.n1mm_name = None
+        self.n1mm_targets = None
+
+    def start_syslog(self, settings):
+        """
+        :param settings: (target, format, hostname)
+        """
+        target, rfc, hostname = settings
+        try:
+            host, port = syslog_udp.parse_target(target)
+            self.syslog_sender = syslog_udp.SyslogSender(host, port, hostname, rfc)
+        except Exception as exc:
+            logging.exception('cannot send logs to syslog server %s', 'main:ServiceManager:start_syslog', target,
+                              exc_info=exc)
+            return
+        self.syslog_task = asyncio.create_task(self.syslog_sender.send_records())
+        self.syslog_settings = settings
+        logging.info('sending logs to syslog server %s:%d', 'main:ServiceManager:start_syslog', host, port)
+
+    def stop_syslog(self):
+        if self.syslog_sender is not None:
+            logging.info('Stopping syslog', 'main:ServiceManager:stop_syslog')
+            self.syslog_sender.stop()
+            self.syslog_task.cancel()
+            self.syslog_sender.close()
+            self.syslog_sender = None
+            self.syslog_task = None
+        self.syslog_settings = None
+
+    async def start(self, config, ip_address, netmask, ap_mode):
+        self.ip_address = ip_address
+        self.netmask = netmask
+        self.ap_mode = ap_mode
+        self.started = True
+        if upython and not ap_mode and self.clock_task is None:
+            self.clock_task = asyncio.create_task(keep_clock_set())
+        await self.start_web(get_port(config, 'web_port', DEFAULT_WEB_PORT))
+        await self.start_tcp(get_port(config, 'tcp_port', DEFAULT_TCP_PORT))
+        await self.start_rotctld(get_port(config, 'rotctld_port', DEFAULT_ROTCTLD_PORT))
+        if config.get('n1mm') and not ap_mode:
+            self.start_n1mm(config.get('hostname'), config.get('n1mm_targets'))
+        syslog_settings = get_syslog_settings(config)
+        if syslog_settings is not None:
+            self.start_syslog(syslog_settings)
+
+    async def apply_config(self, config):
+        """
+        restart only the services whose configuration changed.
+        :return: elapsed milliseconds, or -1 if nothing needed to be restarted.
+        """
+        if not self.started:
+            return -1
+        t0 = milliseconds()
+        reconfigured = False
+        hostname = config.get('hostname')
+        if self.picow_network is not None and hostname and hostname != self.picow_network.get_hostname():
+            # takes effect on the next DHCP lease / mDNS announcement, no need to rejoin the network.
+            self.picow_network.set_hostname(hostname)
+            reconfigured = True
+        if not config.get('rotors') and hostname and rotator is not None and rotator.name != hostname:
+            # the single default rotor is named for the host.
+            del rotators[rotator.name]
+            rotator.name = hostname
+            rotators[hostname] = rotator
+            reconfigured = True
+        web_port = get_port(config, 'web_port', DEFAULT_WEB_PORT)
+        if web_port != self.web_port:
+            # this runs inside the /api/config request, and closing the web server waits for that request,
+            # so the restart is left to a task that runs after the response is sent.  a restart that is
+            # already running picks up the new port itself: cancelling it could leave a server listening.
+            self.web_port = web_port
+            if self.web_restart_task is None or self.web_restart_task.done():
+                self.web_restart_task = asyncio.create_task(self.restart_web())
+            reconfigured = True
+        tcp_port = get_port(config, 'tcp_port', DEFAULT_TCP_PORT)
+        if tcp_port != self.tcp_port:
+            await self.stop_tcp()
+            await self.start_tcp(tcp_port)
+            reconfigured = True
+        rotctld_port = get_port(config, 'rotctld_port', DEFAULT_ROTCTLD_PORT)
+        if rotctld_port != self.rotctld_port:
+            await self.stop_rotctld()
+            await self.start_rotctld(rotctld_port)
+            reconfigured = True
+        n1mm_name = hostname if config.get('n1mm') and not self.ap_mode else None
+        n1mm_targets = config.get('n1mm_targets') if n1mm_name is not None else None
+        if n1mm_name != self.n1mm_name or n1mm_targets != self.n1mm_targets:
+            self.stop_n1mm()
+            if n1mm_name is not None:
+                self.start_n1mm(n1mm_name, n1mm_targets)
+            reconfigured = True
+        syslog_settings = get_syslog_settings(config)
+        if syslog_settings != self.syslog_settings:
+            self.stop_syslog()
+            if syslog_settings is not None:
+                self.start_syslog(syslog_settings)
+            reconfigured = True
+        if not reconfigured:
+            return -1
+        elapsed = milliseconds() - t0
+        self.last_reconfigure_ms = elapsed
+        logging.info('services reconfigured in %d ms', 'main:ServiceManager:apply_config', elapsed)
+        return elapsed
+
+
+# noinspection PyUnusedLocal
+@http_server.route(b'/api/n1mm')
+async def api_n1mm_callback(http, verb, args, reader, writer, request_headers=None):
+    sender = service_manager.n1mm_sender if service_manager is not None else None
+    receiver = service_manager.n1mm_receiver if service_manager is not None else None
+    payload = {
+        'enabled': sender is not None,
+        'destinations': sender.status() if sender is not None else [],
+        'receiver': receiver.status() if receiver is not None else {},
+    }
+    http_status = 200
+    bytes_sent = await http.send_simple_response(writer, http_status, http.CT_APP_JSON, payload)
+    return bytes_sent, http_status
+
+
 async def main():
-    global keep_running, rotator
+    global keep_running, service_manager
 
     config = read_config()
+    logging.set_print(config.get('log_print', True))
 
-    rotator = Rotator()
+    load_rotators(config)
+    heap_monitor_task = asyncio.create_task(heap_monitor.sampler())
+    loop_monitor_task = asyncio.create_task(loop_monitor.heartbeat())
 
     if upython:
         picow_network = PicowNetwork(config, DEFAULT_SSID, DEFAULT_SECRET)
+        service_manager = ServiceManager(picow_network)
         morse_code_sender = MorseCode(morse_led)
         morse_code_sender_task = asyncio.create_task(morse_code_sender.morse_sender())
     else:
         picow_network = None
+        service_manager = ServiceManager(None)
         morse_code_sender = None
         morse_code_sender_task = None
 
-    tcp_port = safe_int(config.get('tcp_port') or DEFAULT_TCP_PORT, DEFAULT_TCP_PORT)
-    if tcp_port < 0 or tcp_port > 65535:
-        tcp_port = DEFAULT_TCP_PORT
-    web_port = safe_int(config.get('web_port') or DEFAULT_WEB_PORT, DEFAULT_WEB_PORT)
-    if web_port < 0 or web_port > 65535:
-        web_port = DEFAULT_WEB_PORT
-
     connected = False
     newly_connected = False
     reset_button_pressed_count = 0
@@ -350,6 +1356,7 @@ async def main():
         four_count += 1
         if four_count > 3:
             four_count = 0
+            uptime_seconds()  # keep the uptime count ahead of the ticks_ms wrap.
             if picow_network is not None:
                 if not connected:
                     logging.debug('checking network connection', 'main:main')
@@ -357,7 +1364,7 @@ async def main():
                     if connected:
                         ip_address = picow_network.get_ip_address()
                         netmask = picow_network.get_netmask()
-                        logging.info(f'ip_address {ip_address}, netmask {netmask}', 'main:main')
+                        logging.info('ip_address %s, netmask %s', 'main:main', ip_address, netmask)
                         newly_connected = True
                     else:
                         logging.info('waiting for picow network', 'main:main')
@@ -373,32 +1380,7 @@ async def main():
 
         if newly_connected:
             newly_connected = False
-            logging.info(f'Starting web service on port {web_port}', 'main:main')
-            asyncio.create_task(asyncio.start_server(http_server.serve_http_client, '0.0.0.0', web_port))
-            logging.info(f'Starting tcp service on port {tcp_port}', 'main:main')
-            asyncio.create_task(asyncio.start_server(serve_serial_client, '0.0.0.0', tcp_port))
-
-            n1mm_mode = config.get('n1mm')
-            if n1mm_mode and not ap_mode:
-                hostname = config.get('hostname')
-                logging.info(f'configuring N1MM Mode with ip address {ip_address} net mask {netmask}',
-                             'main:main')
-                broadcast_address = n1mm_udp.calculate_broadcast_address(ip_address, netmask)
-                logging.info(f'Broadcast address (to N1MM) is {broadcast_address}', 'main:main')
-                logging.info(f'Starting rotor position broadcasts for N1MM on port {N1MM_BROADCAST_FROM_ROTOR_PORT}',
-                             'main:main')
-                send_broadcast_from_n1mm = n1mm_udp.SendBroadcastFromN1MM(broadcast_address,
-                                                                          target_port=N1MM_BROADCAST_FROM_ROTOR_PORT,
-                                                                          rotator=rotator,
-                                                                          my_name=hostname)
-                logging.info(f'Starting listener for UDP position broadcasts from N1MM on port {N1MM_ROTOR_BROADCAST_PORT}',
-                             'main:main')
-                receive_broadcast_from_n1mm = n1mm_udp.ReceiveBroadcastsFromN1MM(ip_address,
-                                                                                 receive_port=N1MM_ROTOR_BROADCAST_PORT,
-                                                                                 rotator=rotator,
-                                                                                 my_name=hostname)
-                n1mm_sender = asyncio.create_task(send_broadcast_from_n1mm.send_datagrams())
-                n1mm_receiver = asyncio.create_task(receive_broadcast_from_n1mm.wait_for_datagram())
+            await service_manager.start(config, ip_address, netmask, ap_mode)
 
         if upython:
             pressed = reset_button.value() == 0
@@ -411,10 +1393,11 @@ async def main():
 
                 logging.info('reset button pressed', 'main:main')
                 ap_mode = not ap_mode
-                config['ap_mode'] = ap_mode
-                save_config(config)
+                save_config({'ap_mode': ap_mode})
+                config_store.flush()
                 keep_running = False
 
+    config_store.flush()  # do not lose a pending write-back.
     if upython:
         machine.soft_reset()
 
@@ -0,0 +1,281 @@
+#
+# metrics.py -- a shared registry of counters and gauges, rendered in the Prometheus text format.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+from array import array
+
+COUNTER = b'counter'
+GAUGE = b'gauge'
+HISTOGRAM = b'histogram'
+
+
+def _encode(value):
+    return value.encode() if isinstance(value, str) else value
+
+
+class MetricsBuffer:
+    """
+    a preallocated buffer the exposition text is written into, so a scrape does not build strings.
+    writes that do not fit set overflow and are dropped, the caller sends what is there and starts over.
+    """
+
+    def __init__(self, size):
+        self.buffer = bytearray(size)
+        self.mv = memoryview(self.buffer)
+        self.size = size
+        self.length = 0
+        self.overflow = False
+
+    def reset(self):
+        self.length = 0
+        self.overflow = False
+
+    def write(self, data):
+        length = self.length
+        end = length + len(data)
+        if end > self.size:
+            self.overflow = True
+            return
+        self.mv[length:end] = data
+        self.length = end
+
+    def write_int(self, value):
+        value = int(value)
+        if value < 0:
+            self.write(b'-')
+            value = -value
+        digits = 1
+        scale = 10
+        while value >= scale:
+            digits += 1
+            scale *= 10
+        end = self.length + digits
+        if end > self.size:
+            self.overflow = True
+            return
+        buffer = self.buffer
+        for i in range(end - 1, self.length - 1, -1):
+            buffer[i] = 0x30 + value % 10
+            value //= 10
+        self.length = end
+
+    def write_millis(self, value):
+        # milliseconds as seconds, the unit prometheus expects.
+        self.write_int(value // 1000)
+        value %= 1000
+        self.write(b'.00' if value < 10 else b'.0' if value < 100 else b'.')
+        self.write_int(value)
+
+    def write_label_value(self, value):
+        # label values can come from the configuration, so escape what would end the quoted string.
+        if b'\\' in value or b'"' in value or b'\n' in value:
+            value = value.replace(b'\\', b'\\\\').replace(b'"', b'\\"').replace(b'\n', b'\\n')
+        self.write(value)
+
+    def header(self, metric):
+        self.write(b'# HELP ')
+        self.write(metric.name)
+        self.write(b' ')
+        self.write(metric.help)
+        self.write(b'\n# TYPE ')
+        self.write(metric.name)
+        self.write(b' ')
+        self.write(metric.kind)
+        self.write(b'\n')
+
+    def sample(self, name, value, labels=None, label_values=None):
+        """
+        write one sample line, like name{label="value"} 12
+        :param labels: tuple of encoded label names
+        :param label_values: tuple of the same length, each bytes, str, or int
+        """
+        self.write(name)
+        if labels:
+            self.write(b'{')
+            for i in range(len(labels)):
+                if i:
+                    self.write(b',')
+                self.write(labels[i])
+                self.write(b'="')
+                label_value = label_values[i]
+                if isinstance(label_value, int):
+                    self.write_int(label_value)
+                else:
+                    self.write_label_value(_encode(label_value))
+                self.write(b'"')
+            self.write(b'}')
+        self.write(b' ')
+        self.write_int(value)
+        self.write(b'\n')
+
+
+class Metric:
+    """
+    a single counter or gauge.  its value is set by its owner, or read from source() when scraped.
+    """
+
+    def __init__(self, name, kind, help_text, source=None):
+        self.name = _encode(name)
+        self.kind = kind
+        self.help = _encode(help_text)
+        self.source = source
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+    def render(self, out):
+        value = self.source() if self.source is not None else self.value
+        if value is None:  # nothing to report now
+            return
+        out.header(self)
+        out.sample(self.name, value)
+
+
+class LabeledMetric:
+    """
+    a counter or gauge with one series per combination of label values.
+    series are created on first use, so keep the label values to a small fixed set.
+    """
+
+    def __init__(self, name, kind, help_text, labels):
+        self.name = _encode(name)
+        self.kind = kind
+        self.help = _encode(help_text)
+        self.labels = tuple(_encode(label) for label in labels)
+        self.series = {}
+
+    def inc(self, label_values, amount=1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def set(self, label_values, value):
+        self.series[label_values] = value
+
+    def render(self, out):
+        out.header(self)
+        for label_values, value in self.series.items():
+            out.sample(self.name, value, self.labels, label_values)
+
+
+class Collector:
+    """
+    a counter or gauge whose series are written by collect(out, metric) when scraped, for values that
+    live elsewhere, like per-rotor serial statistics.  collect calls out.sample(metric.name, value, ...).
+    """
+
+    def __init__(self, name, kind, help_text, collect):
+        self.name = _encode(name)
+        self.kind = kind
+        self.help = _encode(help_text)
+        self.collect = collect
+
+    def render(self, out):
+        out.header(self)
+        self.collect(out, self)
+
+
+class Histogram:
+    """
+    a histogram of millisecond values, like request latency, exposed in seconds.
+    """
+
+    def __init__(self, name, help_text, bounds_ms):
+        self.name = _encode(name)
+        self.kind = HISTOGRAM
+        self.help = _encode(help_text)
+        self.bounds_ms = bounds_ms
+        self.counts = array('l', [0] * len(bounds_ms))
+        self.count = 0
+        self.sum_ms = 0
+        self.bucket_name = self.name + b'_bucket'
+        self.sum_name = self.name + b'_sum'
+        self.count_name = self.name + b'_count'
+        # bucket bounds in seconds, encoded once.
+        self.le = [b'%d.%03d' % (bound // 1000, bound % 1000) for bound in bounds_ms]
+
+    def observe(self, value_ms):
+        self.count += 1
+        self.sum_ms += value_ms
+        bounds_ms = self.bounds_ms
+        for i in range(len(bounds_ms)):
+            if value_ms <= bounds_ms[i]:
+                self.counts[i] += 1
+                break
+
+    def render(self, out):
+        out.header(self)
+        cumulative = 0
+        for i in range(len(self.bounds_ms)):
+            cumulative += self.counts[i]
+            out.write(self.bucket_name)
+            out.write(b'{le="')
+            out.write(self.le[i])
+            out.write(b'"} ')
+            out.write_int(cumulative)
+            out.write(b'\n')
+        out.write(self.bucket_name)
+        out.write(b'{le="+Inf"} ')
+        out.write_int(self.count)
+        out.write(b'\n')
+        out.write(self.sum_name)
+        out.write(b' ')
+        out.write_millis(self.sum_ms)
+        out.write(b'\n')
+        out.sample(self.count_name, self.count)
+
+
+class Registry:
+    """
+    the metrics to expose.  any module can register into the shared registry below.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, source=None):
+        return self.register(Metric(name, COUNTER, help_text, source))
+
+    def gauge(self, name, help_text, source=None):
+        return self.register(Metric(name, GAUGE, help_text, source))
+
+    def labeled_counter(self, name, help_text, labels):
+        return self.register(LabeledMetric(name, COUNTER, help_text, labels))
+
+    def collector(self, name, kind, help_text, collect):
+        return self.register(Collector(name, kind, help_text, collect))
+
+    def histogram(self, name, help_text, bounds_ms):
+        return self.register(Histogram(name, help_text, bounds_ms))
+
+
+registry = Registry()
@@ -22,9 +22,9 @@ LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
 OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
 OF THE POSSIBILITY OF SUCH DAMAGE.
 """
-__version__ = '0.0.9'
+__version__ = '0.1.0'
 
-from utils import get_timestamp, upython
+from utils import get_timestamp_ms, upython
 
 if not upython:
     def const(i):
@@ -39,11 +39,20 @@ NOTHING = const(0)
 
 loglevel = ERROR
 
+# the most recent log lines are kept in a fixed-size ring so they can be read over the network.
+LOG_RING_SIZE = const(4096)
+
+print_enabled = True
+_ring = bytearray(LOG_RING_SIZE)
+_ring_mv = memoryview(_ring)
+_ring_head = 0  # where the next byte goes
+_ring_wrapped = False
+
 level_names = ['NOTHING', 'CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG']
 
 
 def set_level(level):
-    info(f'setting log level to {level}', 'micro_logging:set_level')
+    info('setting log level to %s', 'micro_logging:set_level', level)
 
     global loglevel
     if isinstance(level, str):
@@ -62,42 +71,123 @@ def set_level(level):
 def should_log(level):
     return level <= loglevel
 
-def _log(level: str, message: str, caller=None):
-    level = '[' + level + ']'
+
+# other places log lines go, like syslog.  each is called as sink(level, timestamp, caller, message)
+# for every line that is logged, so it must be quick and must not log.
+_sinks = []
+
+
+def add_sink(sink):
+    if sink not in _sinks:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def set_print(enabled):
+    """
+    turn printing of log lines on or off.  the ring always gets them.
+    printing blocks on the USB serial port, and goes nowhere when no host is attached.
+    """
+    global print_enabled
+    print_enabled = bool(enabled)
+
+
+def _ring_write(data):
+    global _ring_head, _ring_wrapped
+    size = len(data)
+    if size >= LOG_RING_SIZE:  # only the tail will fit
+        data = memoryview(data)[size - LOG_RING_SIZE:]
+        size = LOG_RING_SIZE
+    head = _ring_head
+    first = LOG_RING_SIZE - head
+    if size < first:
+        _ring_mv[head:head + size] = data
+        _ring_head = head + size
+    else:
+        data = memoryview(data)
+        _ring_mv[head:] = data[:first]
+        _ring_mv[:size - first] = data[first:]
+        _ring_head = size - first
+        _ring_wrapped = True
+
+
+def ring_contents():
+    """
+    get the logged lines held in the ring, oldest first, without copying them.
+    the views are only valid until the next log line is written, so write them out before awaiting anything.
+    :return: (older, newer) memoryviews of whole lines
+    """
+    head = _ring_head
+    if not _ring_wrapped:
+        return _ring_mv[:0], _ring_mv[:head]
+    if _ring[head - 1] == 10:  # the oldest line starts at head
+        return _ring_mv[head:], _ring_mv[:head]
+    # the oldest line was partly overwritten, skip to the start of the next one.
+    start = head
+    while start < LOG_RING_SIZE and _ring[start] != 10:
+        start += 1
+    if start < LOG_RING_SIZE:
+        return _ring_mv[start + 1:], _ring_mv[:head]
+    start = 0
+    while start < head and _ring[start] != 10:
+        start += 1
+    return _ring_mv[:0], _ring_mv[start + 1:head] if start < head else _ring_mv[:0]
+
+
+def _log(level: str, message: str, caller=None, args=None):
+    if args:
+        message = message % args
+    timestamp = get_timestamp_ms()
+    tag = '[' + level + ']'
     if caller is None:
-        print(f'{get_timestamp()} {level:<11s} {message}')
+        line = f'{timestamp} {tag:<11s} {message}'
     else:
-        print(f'{get_timestamp()} {level:<11s} [{caller}] {message}')
+        line = f'{timestamp} {tag:<11s} [{caller}] {message}'
+    if print_enabled:
+        print(line)
+    _ring_write(line.encode())
+    _ring_write(b'\n')
+    for sink in _sinks:
+        sink(level, timestamp, caller, message)
+
 
+# the message may be a %-style format with its arguments after the caller, like
+#   debug('%d datagrams in batch', 'n1mm_udp:wait_for_datagram', batch)
+# it is only formatted when the level is enabled, so filtered messages cost no heap.
 
-def debug(message, caller=None):
+def debug(message, caller=None, *args):
     if loglevel >= DEBUG:
-        _log('DEBUG', message, caller)
+        _log('DEBUG', message, caller, args)
 
 
-def info(message, caller=None):
+def info(message, caller=None, *args):
     if loglevel >= INFO:
-        _log('INFO', message, caller)
+        _log('INFO', message, caller, args)
 
 
-def warning(message, caller=None):
+def warning(message, caller=None, *args):
     if loglevel >= WARNING:
-        _log('WARNING', message, caller)
+        _log('WARNING', message, caller, args)
 
 
-def error(message, caller=None):
+def error(message, caller=None, *args):
     if loglevel >= ERROR:
-        _log('ERROR', message, caller)
+        _log('ERROR', message, caller, args)
 
 
-def exception(message:str, caller:str = None, exc_info:Exception = None) -> None:
+def exception(message:str, caller:str = None, *args, exc_info:Exception = None) -> None:
+    if args:
+        message = message % args
     if exc_info is not None:
         _log('EXCEPTION', f'{message} {type(exc_info)} {exc_info}', caller)
     else:
         _log('EXCEPTION', message, caller)
 
 
-def critical(message, caller=None):
+def critical(message, caller=None, *args):
     if loglevel >= CRITICAL:
-        _log('CRITICAL', message, caller)
-
+        _log('CRITICAL', message, caller, args)
@@ -75,7 +75,7 @@ class MorseCode:
         # do not send periods in Morse code, send a space instead.
         new_message = new_message.upper().replace('.', ' ')
         if self.message != new_message:
-            logging.info(f'new message "{new_message}")', 'morse_code:set_message')
+            logging.info('new message "%s")', 'morse_code:set_message', new_message)
             self.message = new_message
 
     async def morse_sender(self):
@@ -88,12 +88,12 @@ class MorseCode:
 
         while self.keep_running:
             msg = self.message
-            logging.debug(f'starting message "{msg}"', 'morse_code:morse_sender')
+            logging.debug('starting message "%s"', 'morse_code:morse_sender', msg)
             for morse_letter in msg:
                 blink_pattern = patterns.get(morse_letter)
                 if blink_pattern is None:
-                    logging.debug(f'No pattern for letter "{morse_letter}" ({ord(morse_letter)})',
-                                  'morse_code:morse_sender')
+                    logging.debug('No pattern for letter "%s" (%s)', 'morse_code:morse_sender', morse_letter,
+                                  ord(morse_letter))
                     blink_pattern = patterns.get(' ')
                 for blink_time in blink_pattern:
                     if blink_time > 0:
@@ -21,15 +21,19 @@ OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 __version__ = '0.9.1'
 
-from utils import upython
+from utils import micropython, profiled, upython
 import asyncio
-if upython:
-    import micro_logging as logging
-else:
-    import logging
+import micro_logging as logging
+from loop_monitor import set_activity
 import socket
+from tenths import parse_tenths
+
+if not upython:
+    def const(i):
+        return i
 
 ROTOR_BROADCAST_BUF_SIZE = 512
+HEARTBEAT_INTERVAL = 5.0  # seconds between position datagrams while the rotator is not moving.
 
 
 def calculate_broadcast_address(ip_address, netmask):
@@ -57,32 +61,252 @@ def get_element(src, name):
     return None
 
 
+# N1MM rotor datagram element names, pre-encoded for matching in the receive buffer.
+TAG_ROTOR = b'rotor'
+TAG_GOAZI = b'goazi'
+TAG_OFFSET = b'offset'
+TAG_BIDIRECTIONAL = b'bidirectional'
+TAG_FREQBAND = b'freqband'
+_LT = const(0x3c)  # '<'
+_GT = const(0x3e)  # '>'
+_SLASH = const(0x2f)  # '/'
+_ZERO = const(0x30)  # '0'
+
+
+@micropython.native
+def bytes_equal(buf, start: int, end: int, value) -> bool:
+    # compare buf[start:end] to value without slicing.
+    n = len(value)
+    if end - start != n:
+        return False
+    for i in range(n):
+        if buf[start + i] != value[i]:
+            return False
+    return True
+
+
+class RotorDatagram:
+    """
+    the interesting fields of an N1MM rotor datagram, reused for every datagram.
+    the rotor name is kept as offsets into the receive buffer so that it is never copied.
+    """
+
+    def __init__(self):
+        self.rotor_start = 0
+        self.rotor_end = -1
+        self.goazi = None  # tenths of degrees
+        self.offset = 0  # tenths of degrees
+        self.bidirectional = False
+        self.freqband = None  # tenths of MHz
+
+    def reset(self):
+        self.rotor_start = 0
+        self.rotor_end = -1
+        self.goazi = None
+        self.offset = 0
+        self.bidirectional = False
+        self.freqband = None
+
+    def rotor_is(self, buf, name) -> bool:
+        return bytes_equal(buf, self.rotor_start, self.rotor_end, name)
+
+
+@micropython.native
+def parse_rotor_datagram(buf, length: int, datagram) -> bool:
+    """
+    extract rotor, goazi, offset, bidirectional and freqband from an N1MM rotor datagram
+    in a single pass over buf[:length], e.g.
+    <N1MMRotor><rotor>rotor-50</rotor><goazi>66.0</goazi><offset>0.0</offset><bidirectional>0</bidirectional><freqband>28.0</freqband></N1MMRotor>
+    :return: True if the datagram has a rotor name and a valid goazi
+    """
+    datagram.reset()
+    found_rotor = False
+    i = 0
+    while i < length:
+        if buf[i] != _LT:
+            i += 1
+            continue
+        tag_start = i + 1
+        if tag_start >= length or buf[tag_start] == _SLASH:  # closing tag
+            i = tag_start
+            continue
+        tag_end = tag_start
+        while tag_end < length and buf[tag_end] != _GT:
+            tag_end += 1
+        value_start = tag_end + 1
+        value_end = value_start
+        while value_end < length and buf[value_end] != _LT:
+            value_end += 1
+        if bytes_equal(buf, tag_start, tag_end, TAG_ROTOR):
+            datagram.rotor_start = value_start
+            datagram.rotor_end = value_end
+            found_rotor = True
+        elif bytes_equal(buf, tag_start, tag_end, TAG_GOAZI):
+            datagram.goazi = parse_tenths(buf, value_start, value_end)
+        elif bytes_equal(buf, tag_start, tag_end, TAG_OFFSET):
+            datagram.offset = parse_tenths(buf, value_start, value_end) or 0
+        elif bytes_equal(buf, tag_start, tag_end, TAG_BIDIRECTIONAL):
+            datagram.bidirectional = value_end > value_start and buf[value_start] != _ZERO
+        elif bytes_equal(buf, tag_start, tag_end, TAG_FREQBAND):
+            datagram.freqband = parse_tenths(buf, value_start, value_end)
+        i = value_end
+    return found_rotor and datagram.goazi is not None
+
+
+def parse_targets(value, default_port):
+    """
+    parse extra N1MM destinations, either a list or a comma separated string of 'host' or 'host:port'.
+    :return: list of (host, port) tuples
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    targets = []
+    for item in value:
+        item = item.strip()
+        if len(item) == 0:
+            continue
+        if ':' in item:
+            host, port = item.split(':', 1)
+            port = int(port)
+        else:
+            host = item
+            port = default_port
+        targets.append((host, port))
+    return targets
+
+
+def is_multicast(ip_address):
+    try:
+        first_octet = int(ip_address.split('.')[0])
+    except ValueError:
+        return False
+    return 224 <= first_octet <= 239
+
+
+class Destination:
+    """
+    one place position datagrams are sent to, with counters so a misbehaving target can be spotted.
+    """
+
+    def __init__(self, host, port, kind):
+        self.host = host
+        self.port = port
+        self.kind = kind  # 'broadcast', 'unicast', or 'multicast'
+        self.sockaddr = socket.getaddrinfo(host, port)[0][-1]
+        self.sent = 0
+        self.errors = 0
+        self.last_error = None
+
+    def status(self):
+        return {
+            'host': self.host,
+            'port': self.port,
+            'kind': self.kind,
+            'sent': self.sent,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
 class SendBroadcastFromN1MM:
     """
-    class to send UDP datagrams to N1MM
+    class to send UDP datagrams to N1MM.
+    datagrams go to the subnet broadcast address and to any extra unicast or multicast targets.
     """
 
-    def __init__(self, target_ip, target_port, rotator=None, my_name=None):
+    def __init__(self, target_ip, target_port, rotator=None, my_name=None, extra_targets=None, rotators=None):
+        """
+        :param rotator: the rotator to report, named my_name
+        :param rotators: or, a list of rotators to report, each named by its name attribute
+        """
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.sockaddr = socket.getaddrinfo(target_ip, target_port)[0][-1]
-        self.rotator = rotator
-        self.my_name = my_name
+        if hasattr(socket, 'SO_BROADCAST'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.destinations = []
+        if target_ip is not None:
+            self.destinations.append(Destination(target_ip, target_port, 'broadcast'))
+        for host, port in extra_targets or []:
+            try:
+                if is_multicast(host):
+                    if hasattr(socket, 'IP_MULTICAST_TTL'):
+                        self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+                    self.destinations.append(Destination(host, port, 'multicast'))
+                else:
+                    self.destinations.append(Destination(host, port, 'unicast'))
+            except Exception as exc:
+                logging.exception('cannot add N1MM target %s:%s', 'n1mm_udp:SendBroadcastFromN1MM:init', host, port,
+                                  exc_info=exc)
+        if rotators is None:
+            self.rotors = [(str(my_name).encode('utf-8'), rotator)]
+        else:
+            self.rotors = [(str(r.name).encode('utf-8'), r) for r in rotators]
         self.run = True
+        self.tasks = []
 
     def send(self, payload):
-        self.socket.sendto(payload.encode(), self.sockaddr)
+        """
+        send one payload to every destination.  it is encoded once, by the caller.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode()
+        sendto = self.socket.sendto
+        for destination in self.destinations:
+            try:
+                sendto(payload, destination.sockaddr)
+                destination.sent += 1
+            except OSError as exc:
+                destination.errors += 1
+                destination.last_error = str(exc)
+
+    def status(self):
+        return [destination.status() for destination in self.destinations]
 
     async def send_datagrams(self):
-        while self.run:
-            bearing = await self.rotator.get_rotator_bearing()
-            message = f'{self.my_name} @ {bearing * 10}'  # TODO make this into bytes
-            #message = '%s @ %d' % (self.my_name, bearing)
-            self.send(message)
-            await asyncio.sleep(1.50)
+        """
+        report every rotor.  each rotor gets its own task so one slow serial link does not delay the other.
+        """
+        self.tasks = [asyncio.create_task(self.send_positions(name, rotator)) for name, rotator in self.rotors]
+        try:
+            for task in self.tasks:
+                await task
+        finally:
+            for task in self.tasks:
+                task.cancel()
+            self.tasks = []
+
+    async def send_positions(self, name, rotator):
+        """
+        send the position as soon as it changes, and a heartbeat while it does not.
+        the rotator's shared poller does the serial reads.
+        """
+        payload = b''
+        payload_bearing = None
+        rotator.subscribe()
+        try:
+            bearing = await rotator.get_cached_bearing()
+            while self.run:
+                if bearing >= 0:
+                    if bearing != payload_bearing:  # the payload is only rebuilt when the bearing changes.
+                        payload = b'%s @ %d' % (name, bearing)  # N1MM positions are tenths, like bearings
+                        payload_bearing = bearing
+                    self.send(payload)
+                try:
+                    bearing = await asyncio.wait_for(rotator.wait_for_bearing_change(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    bearing = rotator.last_bearing
+        finally:
+            rotator.unsubscribe()
 
     def stop(self):
         self.run = False
+        for task in self.tasks:
+            task.cancel()
+
+    def close(self):
+        self.socket.close()
 
 
 class ReceiveBroadcastsFromN1MM:
@@ -90,43 +314,155 @@ class ReceiveBroadcastsFromN1MM:
     class that receives rotor control datagrams from N1MM
     """
 
-    def __init__(self, receive_ip, receive_port, rotator=None, my_name=None):
+    def __init__(self, receive_ip, receive_port, rotator=None, my_name=None, rotators=None):
+        """
+        :param rotator: the rotator to control, named my_name
+        :param rotators: or, a list of rotators to control, each named by its name attribute
+        """
         self.receive_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.receive_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.rotator = rotator
-        self.my_name = my_name
+        if rotators is None:
+            rotators = [rotator]
+            names = [my_name]
+        else:
+            names = [r.name for r in rotators]
+        self.rotators = rotators
+        self.rotor_names = [str(name).encode('utf-8') for name in names]
+        # newest request per rotor not yet taken by its worker
+        self.pending = [None] * len(rotators)  # goazi, tenths of degrees
+        self.pending_offset = [0] * len(rotators)
+        self.pending_bidirectional = [False] * len(rotators)
+        self.pending_ready = [asyncio.Event() for _ in rotators]
         self.run = True
+        self.stream = None
+        self.buffer = bytearray(ROTOR_BROADCAST_BUF_SIZE)
+        self.bmv = memoryview(self.buffer)
+        self.datagram = RotorDatagram()
+        self.datagrams_received = 0
+        self.datagrams_coalesced = 0
+        # micropython sockets have readinto, cpython sockets have recv_into.
+        self._recv_into = getattr(self.receive_socket, 'recv_into', None) or self.receive_socket.readinto
         try:
             sockaddr = socket.getaddrinfo(receive_ip, receive_port)[0][-1]
             self.receive_socket.bind(sockaddr)
-            self.receive_socket.settimeout(0.001)
+            self.receive_socket.setblocking(False)
+            if upython:
+                # the stream wrapper registers the socket with the asyncio poller.
+                self.stream = asyncio.StreamReader(self.receive_socket)
         except Exception as exc:
             logging.exception('problem setting up socket', 'n1mm_udp:ReceiveBroadcastsFromN1MM:init', exc_info=exc)
 
+    async def receive_into(self, buffer):
+        """
+        wait for the socket to become readable, without polling, then read the datagram into buffer.
+        :return: number of bytes received
+        """
+        if upython:
+            return await self.stream.readinto(buffer) or 0
+        return await asyncio.get_running_loop().sock_recv_into(self.receive_socket, buffer)
+
+    def receive_pending_into(self, buffer):
+        """
+        read a datagram that is already queued, without waiting.
+        :return: number of bytes received, 0 if nothing is queued.
+        """
+        try:
+            return self._recv_into(buffer) or 0
+        except OSError:  # EAGAIN, nothing queued.
+            return 0
+
+    @profiled('n1mm_udp:parse_rotor')
+    def parse_rotor(self, length):
+        """
+        parse the datagram in the receive buffer.  the bearing is left in self.datagram.
+        :return: the index of the rotor it is for, or -1 if it is not for any of ours
+        """
+        datagram = self.datagram
+        bmv = self.bmv
+        if logging.should_log(logging.DEBUG):
+            logging.debug('message "%s"', 'n1mm_udp:ReceiveBroadcastsFromN1MM:parse_rotor', bytes(bmv[:length]))
+        if parse_rotor_datagram(bmv, length, datagram):
+            rotor_names = self.rotor_names
+            for i in range(len(rotor_names)):
+                if datagram.rotor_is(bmv, rotor_names[i]):
+                    return i
+        return -1
+
     async def wait_for_datagram(self):
+        buffer = self.buffer
+        pending = self.pending
+        pending_ready = self.pending_ready
+        # one worker per rotor keeps one command in flight for it, the other rotor's commands do not queue behind it.
+        workers = [asyncio.create_task(self.rotor_worker(i)) for i in range(len(self.rotators))]
+        try:
+            while self.run:
+                try:
+                    length = await self.receive_into(buffer)
+                    set_activity('n1mm_udp:wait_for_datagram')
+                    # drain everything else that queued up while we were busy, only the newest bearing
+                    # for each rotor matters.
+                    batch = 0
+                    while length:
+                        batch += 1
+                        index = self.parse_rotor(length)
+                        if index >= 0:
+                            if pending[index] is not None:
+                                self.datagrams_coalesced += 1
+                            datagram = self.datagram
+                            pending[index] = datagram.goazi
+                            self.pending_offset[index] = datagram.offset
+                            self.pending_bidirectional[index] = datagram.bidirectional
+                        length = self.receive_pending_into(buffer)
+                    self.datagrams_received += batch
+                    if batch > 1:
+                        logging.debug('%d datagrams in batch, total coalesced %d',
+                                      'n1mm_udp:ReceiveBroadcastsFromN1MM:wait_for_datagram', batch,
+                                      self.datagrams_coalesced)
+                    for i in range(len(pending)):
+                        if pending[i] is not None:
+                            pending_ready[i].set()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    logging.exception('problem receiving datagram',
+                                      'n1mm_udp:ReceiveBroadcastsFromN1MM:wait_for_datagram', exc_info=exc)
+                    await asyncio.sleep(0.1)  # do not spin on a broken socket.
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def rotor_worker(self, index):
+        """
+        send the newest pending request for one rotor, one at a time.  requests that arrive while the
+        rotator is busy replace each other in the pending slot, so only the latest is sent.
+        """
+        rotator = self.rotators[index]
+        ready = self.pending_ready[index]
         while self.run:
-            try:
-                udp_data = self.receive_socket.recv(ROTOR_BROADCAST_BUF_SIZE)
-                message = udp_data.decode('utf-8')
-                logging.debug(f'message "{message}"',
-                             'n1mm_udp:ReceiveBroadcastsFromN1MM:wait_for_datagram')
-                rotor_name = get_element(message, 'rotor')
-                if rotor_name == self.my_name:  # or rotor_name == '*':
-                    goazi = get_element(message, 'goazi')
-                    bearing = int(float(goazi))
-                    result = await self.rotator.set_rotator_bearing(bearing)
-                    if result < 0:
-                        logging.info(f'set_rotator_bearing result={result}',
-                                     'n1mm_udp:ReceiveBroadcastsFromN1MM:wait_for_datagram')
-            except OSError as exc:
-                # this is a timeout exception, no data was received, this is not abnormal.
-                pass
-            except Exception as exc:
-                logging.exception('problem receiving datagram',
-                                  'n1mm_udp:ReceiveBroadcastsFromN1MM:wait_for_datagram', exc_info=exc)
-            await asyncio.sleep(0.1)
-        while self.run:
-            pass
+            await ready.wait()
+            ready.clear()
+            goazi = self.pending[index]
+            if goazi is None:
+                continue
+            self.pending[index] = None
+            # honor offset and bidirectional, take the shortest way around.
+            bearing = rotator.plan_bearing(goazi, self.pending_offset[index], self.pending_bidirectional[index])
+            await self.set_bearing(rotator, bearing)
+
+    @staticmethod
+    async def set_bearing(rotator, bearing):
+        result = await rotator.set_rotator_bearing(bearing)
+        if result < 0:
+            logging.info('set_rotator_bearing result=%d', 'n1mm_udp:ReceiveBroadcastsFromN1MM:set_bearing', result)
 
     def stop(self):
         self.run = False
+
+    def close(self):
+        self.receive_socket.close()
+
+    def status(self):
+        return {
+            'datagrams_received': self.datagrams_received,
+            'datagrams_coalesced': self.datagrams_coalesced,
+        }
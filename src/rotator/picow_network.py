@@ -29,6 +29,7 @@ __version__ = '0.10.2'  # 2025-12-31
 
 import asyncio
 import micro_logging as logging
+from loop_monitor import set_activity
 from utils import upython
 
 if upython:
@@ -98,6 +99,7 @@ class PicowNetwork:
             self._message = 'INIT'
         self._status = 0
         self._wlan = None
+        self.connects = 0  # successful connections, more than one means the network dropped.
         asyncio.create_task(self.keep_alive())
 
     def get_ip_address(self):
@@ -106,6 +108,17 @@ class PicowNetwork:
     def get_netmask(self):
         return self._netmask
 
+    def get_hostname(self):
+        return self._hostname
+
+    def set_hostname(self, hostname: str) -> None:
+        self._hostname = hostname
+        try:
+            network.hostname(hostname)
+            logging.info('hostname set to "%s"', 'PicowNetwork:set_hostname', hostname)
+        except ValueError:
+            logging.error('Failed to set hostname.', 'PicowNetwork:set_hostname')
+
     def is_connected(self):
         return self._connected
 
@@ -129,7 +142,7 @@ class PicowNetwork:
             self._wlan.config(pm=self._wlan.PM_NONE)  # disable power save, this is a server.
             await sleep(0.1)
             logging.debug('Starting setup WLAN...1', 'PicowNetwork:connect_to_network')
-            logging.info(f'  wlan.active()={self._wlan.active()}', 'PicowNetwork:connect_to_network (new)')
+            logging.info('  wlan.active()=%s', 'PicowNetwork:connect_to_network (new)', self._wlan.active())
             # wlan.deinit turns off the onboard LED because it is connected to the CYW43
             # turn it on again.
             onboard = machine.Pin('LED', machine.Pin.OUT, value=0)
@@ -137,7 +150,7 @@ class PicowNetwork:
             try:
                 if self._long_messages:
                     await self.set_message(f'Setting hostname "{self._hostname}"')
-                logging.info(f'  Setting hostname "{self._hostname}"', 'PicowNetwork:connect_to_network')
+                logging.info('  Setting hostname "%s"', 'PicowNetwork:connect_to_network', self._hostname)
                 network.hostname(self._hostname)
             except ValueError:
                 if self._long_messages:
@@ -161,10 +174,10 @@ class PicowNetwork:
                     self._default_ssid = self._default_ssid + '-' + mac[6:]
             self._wlan.config(ssid=self._default_ssid, key=self._default_secret, security=security)
             self._wlan.active(True)
-            logging.info(f'  wlan.active()={self._wlan.active()}', 'PicowNetwork:connect_to_network')
-            logging.info(f'  ssid={self._wlan.config("ssid")}', 'PicowNetwork:connect_to_network')
-            logging.debug(f'  key={self._default_secret}', 'PicowNetwork:connect_to_network')
-            logging.info(f'  ipconfig addr4={self._wlan.ipconfig("addr4")}', 'PicowNetwork:connect_to_network')
+            logging.info('  wlan.active()=%s', 'PicowNetwork:connect_to_network', self._wlan.active())
+            logging.info('  ssid=%s', 'PicowNetwork:connect_to_network', self._wlan.config("ssid"))
+            logging.debug('  key=%s', 'PicowNetwork:connect_to_network', self._default_secret)
+            logging.info('  ipconfig addr4=%s', 'PicowNetwork:connect_to_network', self._wlan.ipconfig("addr4"))
             self._connected = True
         else:
             if self._long_messages:
@@ -176,7 +189,7 @@ class PicowNetwork:
             logging.debug('Connecting to WLAN...1', 'PicowNetwork:connect_to_network')
             self._wlan.active(True)
             await sleep(0.1)
-            logging.info(f'  wlan.active()={self._wlan.active()}', 'PicowNetwork:connect_to_network (new)')
+            logging.info('  wlan.active()=%s', 'PicowNetwork:connect_to_network (new)', self._wlan.active())
             # wlan.deinit turns off the onboard LED because it is connected to the CYW43
             # turn it on again.
             onboard = machine.Pin('LED', machine.Pin.OUT, value=0)
@@ -184,7 +197,7 @@ class PicowNetwork:
             try:
                 if self._long_messages:
                     await self.set_message(f'Setting hostname\n{self._hostname}')
-                logging.info(f'...setting hostname "{self._hostname}"', 'PicowNetwork:connect_to_network')
+                logging.info('...setting hostname "%s"', 'PicowNetwork:connect_to_network', self._hostname)
                 network.hostname(self._hostname)
                 logging.debug('Connecting to WLAN...5', 'PicowNetwork:connect_to_network')
             except ValueError:
@@ -196,14 +209,15 @@ class PicowNetwork:
             logging.debug('Connecting to WLAN...6', 'PicowNetwork:connect_to_network')
             await sleep(0.1)
 
-            logging.info(f'scanning for best signal for SSID "{self._ssid}".', 'PicowNetwork:connect_to_network')
+            logging.info('scanning for best signal for SSID "%s".', 'PicowNetwork:connect_to_network', self._ssid)
             # scan ssid option is not documented.  Using it here to reduce the result set size.
             # see https://github.com/micropython/micropython/blob/master/extmod/network_cyw43.c#L192
             try:
+                set_activity('PicowNetwork:wlan.scan')
                 scan_results = self._wlan.scan(ssid=self._ssid, passive=True)
             except OSError as ose:
                 scan_results = []
-                logging.exception('WiFi scan() failed', 'PicowNetwork:connect_to_network', ose)
+                logging.exception('WiFi scan() failed', 'PicowNetwork:connect_to_network', exc_info=ose)
             logging.debug('Connecting to WLAN...7', 'PicowNetwork:connect_to_network')
             bssid = None
             best_rssi = -100
@@ -214,16 +228,17 @@ class PicowNetwork:
                 scan_rssi = result[3]
                 scan_security = result[4]
                 scan_hidden = result[5]
-                logging.info(f'Found SSID "{scan_ssid}", BSSID "{scan_bssid}", channel {scan_channel}, RSSI {scan_rssi}, security {scan_security}, hidden {scan_hidden}',
-                              'PicowNetwork:connect_to_network')
+                logging.info('Found SSID "%s", BSSID "%s", channel %s, RSSI %s, security %s, hidden %s',
+                             'PicowNetwork:connect_to_network', scan_ssid, scan_bssid, scan_channel, scan_rssi,
+                             scan_security, scan_hidden)
                 if scan_ssid == self._ssid:
                     if scan_rssi > best_rssi:
                         best_rssi = scan_rssi
                         bssid = result[1]
             if bssid is not None:
                 bssid_str = ''.join([f'{b:02x}' for b in bssid])
-                logging.info(f'Found best RSSI for SSID "{self._ssid}" on BSSID "{bssid_str}" RSSI {best_rssi}',
-                              'PicowNetwork:connect_to_network')
+                logging.info('Found best RSSI for SSID "%s" on BSSID "%s" RSSI %s', 'PicowNetwork:connect_to_network',
+                             self._ssid, bssid_str, best_rssi)
             else:
                 logging.warning('cannot find SSID in scan', 'PicowNetwork:connect_to_network')
 
@@ -237,9 +252,10 @@ class PicowNetwork:
                     self._is_dhcp = True
             if self._is_dhcp:
                 self._wlan.ipconfig(dhcp4=True)
-                logging.info(f'...configuring network with DHCP', 'PicowNetwork:connect_to_network')
+                logging.info('...configuring network with DHCP', 'PicowNetwork:connect_to_network')
             else:
-                logging.info(f'...configuring network with {self._wlan.ipconfig("addr4")}', 'PicowNetwork:connect_to_network')
+                logging.info('...configuring network with %s', 'PicowNetwork:connect_to_network',
+                             self._wlan.ipconfig("addr4"))
 
             connect_timeout = 15
             st = ''
@@ -251,23 +267,24 @@ class PicowNetwork:
                 else:
                     self._wlan.connect(self._ssid, self._secret)
             except OSError as ose:
-                logging.exception('got exception on wlan.connect', 'PicowNetwork:connect_to_network', ose)
-            logging.info(f'...connecting to "{self._ssid}"...', 'PicowNetwork:connect_to_network')
+                logging.exception('got exception on wlan.connect', 'PicowNetwork:connect_to_network', exc_info=ose)
+            logging.info('...connecting to "%s"...', 'PicowNetwork:connect_to_network', self._ssid)
             # logging.debug(f'...using secret "{self._secret}"...', 'PicowNetwork:connect_to_network')
             last_wl_status = -9
             while connect_timeout > 0:
                 wl_status = self._wlan.status()
-                logging.debug(f'wlan.status()={wl_status}', 'PicowNetwork:connect_to_network')
+                logging.debug('wlan.status()=%s', 'PicowNetwork:connect_to_network', wl_status)
                 if wl_status != last_wl_status:
                     last_wl_status = wl_status
                     st = self.network_status_map.get(wl_status) or 'undefined'
-                    logging.info(f'...network status: {wl_status} {st}', 'PicowNetwork:connect_to_network')
+                    logging.info('...network status: %s %s', 'PicowNetwork:connect_to_network', wl_status, st)
                 if wl_status < 0 or wl_status >= 3:
                     break
                 connect_timeout -= 1
                 await sleep(1)
             if wl_status != network.STAT_GOT_IP:
-                logging.warning(f'...network connect failed: {wl_status}, pausing...', 'PicowNetwork:connect_to_network')
+                logging.warning('...network connect failed: %s, pausing...', 'PicowNetwork:connect_to_network',
+                                wl_status)
                 if self._long_messages:
                     await self.set_message(f'Error {wl_status}\n{st}', -wl_status)
                 else:
@@ -279,7 +296,7 @@ class PicowNetwork:
                 return
             await sleep(0.5)
 
-        logging.info(f'...connected: {self._wlan.ipconfig("addr4")}', 'PicowNetwork:connect_to_network')
+        logging.info('...connected: %s', 'PicowNetwork:connect_to_network', self._wlan.ipconfig("addr4"))
         onboard.on()  # turn on the LED, WAN is up.
         ifconfig = self._wlan.ifconfig()
         self._ip_address = ifconfig[0]
@@ -287,6 +304,7 @@ class PicowNetwork:
         self._gateway = ifconfig[2]
         self._dns_server = ifconfig[3]
         self._connected = True
+        self.connects += 1
 
         ssid = self._wlan.config('ssid')
         if self._long_messages:
@@ -301,6 +319,17 @@ class PicowNetwork:
                 msg = f'{self._ip_address} '
         await self.set_message(msg, 1)
 
+    def rssi(self):
+        """
+        :return: signal strength of the access point in dBm, or None if not connected as a station
+        """
+        if self._wlan is None or self._access_point_mode or not self._connected:
+            return None
+        try:
+            return self._wlan.status('rssi')
+        except Exception:
+            return None
+
     def ifconfig(self):
         if self._wlan is not None:
             return self._wlan.ifconfig()
@@ -331,17 +360,17 @@ class PicowNetwork:
                 try:
                     data = self._wlan.config(k)
                     if isinstance(data, str):
-                        logging.info(f'WLAN.config("{k}")="{data}"', 'PicowNetwork:status')
+                        logging.info('WLAN.config("%s")="%s"', 'PicowNetwork:status', k, data)
                     elif isinstance(data, int):
-                        logging.info(f'WLAN.config("{k}")={data}', 'PicowNetwork:status')
+                        logging.info('WLAN.config("%s")=%s', 'PicowNetwork:status', k, data)
                     elif isinstance(data, bytes):
                         mac = ':'.join([f'{b:02x}' for b in data])
-                        logging.info(f'WLAN.config("{k}")={mac}', 'PicowNetwork:status')
+                        logging.info('WLAN.config("%s")=%s', 'PicowNetwork:status', k, mac)
                     else:
-                        logging.info(f'WLAN.config("{k}")={data} {type(data)}', 'PicowNetwork:status')
+                        logging.info('WLAN.config("%s")=%s %s', 'PicowNetwork:status', k, data, type(data))
 
                 except Exception as exc:
-                    logging.warning(f'{exc}: "{k}"', 'PicowNetwork:status')
+                    logging.warning('%s: "%s"', 'PicowNetwork:status', exc, k)
         else:
             logging.warning('Network not initialized.', 'PicowNetwork:status')
 
@@ -355,7 +384,7 @@ class PicowNetwork:
                 self._connected = self._wlan is not None and \
                                   self._wlan.status() == network.STAT_GOT_IP
             if logging.should_log(logging.DEBUG):
-                logging.debug(f'connected = {self._connected}', 'PicowNetwork.keepalive')
+                logging.debug('connected = %s', 'PicowNetwork.keepalive', self._connected)
 
             if not self._connected and not self._connecting:
                 logging.warning('Not connected...  attempting network connect...', 'PicowNetwork:keep_alive')
@@ -370,9 +399,9 @@ class PicowNetwork:
                     self._connected = self._wlan is not None and \
                                       self._wlan.status() == network.STAT_GOT_IP
                 if self._connected:
-                    logging.info(f'Network connected', 'PicowNetwork:keep_alive')
+                    logging.info('Network connected', 'PicowNetwork:keep_alive')
                 else:
-                    logging.warning(f'Failed to connect', 'PicowNetwork:keep_alive')
+                    logging.warning('Failed to connect', 'PicowNetwork:keep_alive')
             await sleep(30 if self._connected else 5)  # check network every 30 seconds when connected, every 5 when not.
         logging.info('keepalive exit', 'PicowNetwork.keepalive loop exit.')
 
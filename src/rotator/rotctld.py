@@ -0,0 +1,161 @@
+#
+# rotctld.py -- Hamlib rotctld compatible TCP rotator control.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import gc
+import micro_logging as logging
+from loop_monitor import set_activity
+
+from tenths import format_tenths, from_degrees, parse_tenths
+from utils import milliseconds, profiled_async
+
+# Hamlib error codes
+RIG_OK = 0
+RIG_EINVAL = -1
+RIG_ENIMPL = -4
+RIG_EIO = -6
+
+ROTCTLD_PROT_VER = 1
+ROT_MODEL = 1  # reported in dump_state, clients only care that it parses.
+MIN_AZ = 0
+MAX_AZ = 360
+
+_MAX_LINE = 64
+
+# short and long forms of the supported commands
+_GET_POS = (b'p', b'\\get_pos')
+_SET_POS = (b'P', b'\\set_pos')
+_STOP = (b'S', b'\\stop')
+_GET_INFO = (b'_', b'\\get_info')
+_DUMP_STATE = (b'\\dump_state',)
+_QUIT = (b'q', b'Q', b'\\quit')
+_EXT_RESP_CHARS = (0x2b, 0x3b, 0x7c, 0x2c)  # '+', ';', '|', ','
+
+
+class RotctldServer:
+    """
+    speaks enough of the Hamlib rotctld text protocol for rotctl, gpredict and friends
+    to talk to the rotator directly, without a virtual serial port.
+    positions are answered from the rotator's shared bearing cache.
+    """
+
+    def __init__(self, rotator, info='Pico-W DCU-1 rotator controller-controller'):
+        self.rotator = rotator
+        self.info = info.encode('utf-8')
+
+    @staticmethod
+    def _report(code):
+        return b'RPRT %d\n' % code
+
+    @profiled_async('rotctld:execute')
+    async def _execute(self, command, args, ext, sep):
+        """
+        execute one command.
+        :return: response bytes, or None to close the connection.
+        """
+        if command in _GET_POS:
+            bearing = await self.rotator.get_cached_bearing()
+            if bearing < 0:
+                return self._report(RIG_EIO)
+            azimuth = format_tenths(bearing, True)
+            if ext:
+                return b'get_pos:%cAzimuth: %s00000%cElevation: 0.000000%cRPRT 0\n' % (sep, azimuth, sep, sep)
+            return b'%s00000\n0.000000\n' % azimuth
+        if command in _SET_POS:
+            if len(args) < 1:
+                return self._report(RIG_EINVAL)
+            azimuth = parse_tenths(args[0])
+            if azimuth is None:
+                return self._report(RIG_EINVAL)
+            if azimuth < from_degrees(MIN_AZ) or azimuth > from_degrees(MAX_AZ):
+                code = RIG_EINVAL
+            else:
+                code = RIG_OK if await self.rotator.set_rotator_bearing(azimuth) >= 0 else RIG_EIO
+            if ext:
+                return b'set_pos: %s%c%s' % (b' '.join(args), sep, self._report(code))
+            return self._report(code)
+        if command in _STOP:
+            code = RIG_OK if await self.rotator.stop_rotator() >= 0 else RIG_EIO
+            if ext:
+                return b'stop:%c%s' % (sep, self._report(code))
+            return self._report(code)
+        if command in _GET_INFO:
+            if ext:
+                return b'get_info:%cInfo: %s%cRPRT 0\n' % (sep, self.info, sep)
+            return self.info + b'\n'
+        if command in _DUMP_STATE:
+            # protocol version, model, min_az, max_az, min_el, max_el, south_zero
+            return b'%d\n%d\n%d.000000\n%d.000000\n0.000000\n0.000000\n0\n' % (
+                ROTCTLD_PROT_VER, ROT_MODEL, MIN_AZ, MAX_AZ)
+        if command in _QUIT:
+            return None
+        return self._report(RIG_ENIMPL)
+
+    async def serve_rotctld_client(self, reader, writer):
+        t0 = milliseconds()
+        partner = writer.get_extra_info('peername')[0]
+        logging.info('rotctld client connected from %s', 'rotctld:serve_rotctld_client', partner)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                set_activity('rotctld:serve_rotctld_client')
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                if len(line) > _MAX_LINE:
+                    writer.write(self._report(RIG_EINVAL))
+                    await writer.drain()
+                    continue
+                ext = False
+                sep = 10  # newline
+                if line[0] in _EXT_RESP_CHARS:
+                    ext = True
+                    if line[0] != 0x2b:  # '+' uses newline, the others are their own separator.
+                        sep = line[0]
+                    line = line[1:]
+                pieces = line.split()
+                if len(pieces) == 0:
+                    continue
+                command = pieces[0]
+                args = pieces[1:]
+                if len(command) > 1 and command[0] != 0x5c:  # short commands can be run together with args
+                    args = [command[1:]] + args
+                    command = command[:1]
+                response = await self._execute(command, args, ext, sep)
+                if response is None:
+                    break
+                writer.write(response)
+                await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+            gc.collect()
+        except Exception as exc:
+            logging.exception('exception in serve_rotctld_client:', 'rotctld:serve_rotctld_client', exc_info=exc)
+        tc = milliseconds()
+        logging.info('rotctld client disconnected, elapsed time %6.3f seconds', 'rotctld:serve_rotctld_client',
+                     (tc - t0) / 1000.0)
@@ -0,0 +1,176 @@
+#
+# scan.py -- step the antenna around a list of bearings, dwelling at each one.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import asyncio
+from array import array
+
+import micro_logging as logging
+from tenths import FULL_CIRCLE, TENTHS_PER_DEGREE, angle_difference, to_decimal_degrees
+from utils import milliseconds, milliseconds_diff
+
+MAX_BEARINGS = 72
+ARRIVAL_TOLERANCE = 2 * TENTHS_PER_DEGREE
+ARRIVAL_STALL = 10  # seconds without movement before the rotator is taken to have stopped short
+
+
+def range_bearings(start, end, step):
+    """
+    the bearings from start to end inclusive in steps, all in tenths of degrees.
+    :return: a list of bearings, or None if the range is empty or too long
+    """
+    if step <= 0:
+        return None
+    if end < start:
+        step = -step
+    count = (end - start) // step + 1
+    if count > MAX_BEARINGS:
+        return None
+    return [start + i * step for i in range(count)]
+
+
+class Scanner:
+    """
+    steps a rotator through a list of bearings, for listening around the compass for beacons.
+    the dwell at each bearing starts only when the controller reports that the rotator got there.
+    status() only reads cached values, so watching the progress costs no serial traffic.
+    """
+
+    def __init__(self):
+        self.bearings = array('h', [0] * MAX_BEARINGS)  # tenths of degrees
+        self.count = 0
+        self.dwell = 0  # seconds
+        self.repeat = False
+        self.rotator = None
+        self.index = 0
+        self.target = -1
+        self.dwell_start = 0
+        self.passes = 0
+        self.stalls = 0
+        self.state = 'off'
+        self.task = None
+
+    @staticmethod
+    def valid_bearings(bearings):
+        """
+        :return: True if there are 1 to MAX_BEARINGS bearings, all from 0 to 360 degrees
+        """
+        if not 0 < len(bearings) <= MAX_BEARINGS:
+            return False
+        for bearing in bearings:
+            if bearing is None or not 0 <= bearing <= FULL_CIRCLE:
+                return False
+        return True
+
+    def start(self, r, bearings, dwell, repeat=False):
+        """
+        :param r: the Rotator
+        :param bearings: bearings in tenths of degrees
+        :param dwell: seconds to stay at each bearing
+        :param repeat: start over after the last bearing
+        :return: False if the bearings are not valid, nothing is changed then
+        """
+        if not self.valid_bearings(bearings):
+            return False
+        self.stop()
+        for i, bearing in enumerate(bearings):
+            self.bearings[i] = bearing
+        self.count = len(bearings)
+        self.rotator = r
+        self.dwell = dwell
+        self.repeat = repeat
+        self.index = 0
+        self.target = -1
+        self.passes = 0
+        self.stalls = 0
+        self.state = 'starting'
+        self.task = asyncio.create_task(self.run())
+        logging.info('scanning %d bearings, dwell %d s, with rotor "%s"', 'scan:start', self.count, dwell, r.name)
+        return True
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+            self.state = 'stopped'
+            logging.info('scan stopped', 'scan:stop')
+
+    async def wait_for_arrival(self, r, target):
+        # the shared poller reports the movement; give up waiting if the rotator stops short.
+        r.subscribe()
+        try:
+            bearing = await r.get_cached_bearing()
+            while bearing < 0 or abs(angle_difference(bearing, target)) > ARRIVAL_TOLERANCE:
+                try:
+                    bearing = await asyncio.wait_for(r.wait_for_bearing_change(), ARRIVAL_STALL)
+                except asyncio.TimeoutError:
+                    self.stalls += 1
+                    logging.warning('rotor "%s" stopped at %s short of %s', 'scan:wait_for_arrival', r.name,
+                                    to_decimal_degrees(bearing), target / 10)
+                    break
+        finally:
+            r.unsubscribe()
+
+    async def run(self):
+        r = self.rotator
+        try:
+            while True:
+                for i in range(self.count):
+                    self.index = i
+                    self.target = r.plan_bearing(self.bearings[i])
+                    self.state = 'moving'
+                    await r.set_rotator_bearing(self.target)
+                    await self.wait_for_arrival(r, self.target)
+                    self.state = 'dwelling'
+                    self.dwell_start = milliseconds()
+                    await asyncio.sleep(self.dwell)
+                self.passes += 1
+                if not self.repeat:
+                    break
+            self.state = 'done'
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.task = None
+
+    def status(self):
+        dwell_remaining = 0
+        if self.state == 'dwelling':
+            dwell_remaining = max(0, self.dwell - milliseconds_diff(milliseconds(), self.dwell_start) // 1000)
+        r = self.rotator
+        return {
+            'state': self.state,
+            'rotor': r.name if r is not None else None,
+            'bearings': [self.bearings[i] / 10 for i in range(self.count)],
+            'index': self.index,
+            'target': to_decimal_degrees(self.target),
+            'bearing': to_decimal_degrees(r.last_bearing) if r is not None else None,  # cached, no serial poll
+            'dwell': self.dwell,
+            'dwell_remaining': dwell_remaining,
+            'repeat': self.repeat,
+            'passes': self.passes,
+            'stalls': self.stalls,
+        }
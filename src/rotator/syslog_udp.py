@@ -0,0 +1,188 @@
+#
+# syslog_udp.py -- send log lines to a syslog server over UDP, RFC 5424 or RFC 3164.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import asyncio
+import micro_logging as logging
+import socket
+from loop_monitor import set_activity
+from utils import upython
+
+if not upython:
+    def const(i):
+        return i
+
+SYSLOG_PORT = const(514)
+MAX_RECORDS = const(32)  # records waiting to be sent, the oldest are dropped past this.
+BATCH_DELAY = 0.2  # seconds to let a burst of log lines collect before sending them.
+RETRY_INTERVAL = 5.0  # seconds between tries while the network refuses datagrams.
+FACILITY = const(16)  # local0
+APP_NAME = 'rotator'
+RFC5424 = '5424'
+RFC3164 = '3164'
+FORMATS = (RFC5424, RFC3164)
+
+# syslog severities for the micro_logging level names.
+SEVERITIES = {
+    'CRITICAL': 2,
+    'ERROR': 3,
+    'EXCEPTION': 3,
+    'WARNING': 4,
+    'INFO': 6,
+    'DEBUG': 7,
+}
+
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def parse_target(value, default_port=SYSLOG_PORT):
+    """
+    parse the syslog server, 'host' or 'host:port'.
+    :return: (host, port)
+    """
+    value = value.strip() if isinstance(value, str) else ''
+    if ':' in value:
+        host, port = value.split(':', 1)
+        port = int(port)
+    else:
+        host = value
+        port = default_port
+    if len(host) == 0 or not 0 < port <= 65535:
+        raise ValueError('bad syslog target')
+    return host, port
+
+
+def format_record(rfc, severity, timestamp, hostname, caller, message):
+    """
+    build one syslog message.
+    :param timestamp: a micro_logging timestamp, like '2026-10-19 12:34:56.789Z'
+    :return: the encoded message
+    """
+    pri = FACILITY * 8 + severity
+    if caller is not None:
+        message = f'[{caller}] {message}'
+    if rfc == RFC3164:
+        # 'Oct 19 12:34:56', the day is space padded.
+        month = MONTHS[int(timestamp[5:7]) - 1]
+        return f'<{pri}>{month} {int(timestamp[8:10]):2d} {timestamp[11:19]} {hostname} {APP_NAME}: {message}'.encode()
+    if timestamp < '2024':  # the clock has not been set, say so rather than send 2000-01-01.
+        timestamp = '-'
+    else:
+        timestamp = timestamp[:10] + 'T' + timestamp[11:]
+    return f'<{pri}>1 {timestamp} {hostname} {APP_NAME} - - - {message}'.encode()
+
+
+class SyslogSender:
+    """
+    a micro_logging sink that queues log lines and sends them to a syslog server from its own task,
+    so a log call never waits on the network.  each record is one datagram, as RFC 5426 requires.
+    """
+
+    def __init__(self, host, port=SYSLOG_PORT, hostname=None, rfc=RFC5424):
+        self.host = host
+        self.port = port
+        self.hostname = hostname or '-'
+        self.rfc = rfc
+        self.sockaddr = socket.getaddrinfo(host, port)[0][-1]
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.records = [None] * MAX_RECORDS
+        self.head = 0  # oldest queued record
+        self.count = 0
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self.ready = asyncio.Event()
+        self.run = True
+        self.sink = self.write  # the same bound method for add_sink and remove_sink.
+
+    def write(self, level, timestamp, caller, message):
+        """
+        queue a log line, called by micro_logging.  this must not log.
+        """
+        record = format_record(self.rfc, SEVERITIES.get(level, 6), timestamp, self.hostname, caller, message)
+        if self.count == MAX_RECORDS:
+            # the network is down or slow, lose the oldest record instead of blocking.
+            self.records[self.head] = None
+            self.head = (self.head + 1) % MAX_RECORDS
+            self.count -= 1
+            self.dropped += 1
+        self.records[(self.head + self.count) % MAX_RECORDS] = record
+        self.count += 1
+        self.ready.set()
+
+    def flush(self) -> bool:
+        """
+        send the queued records, oldest first.
+        :return: False if the network refused one, it stays queued.
+        """
+        set_activity('syslog_udp:flush')
+        sendto = self.socket.sendto
+        while self.count:
+            try:
+                sendto(self.records[self.head], self.sockaddr)
+            except OSError as exc:
+                self.errors += 1
+                self.last_error = str(exc)
+                return False
+            self.records[self.head] = None
+            self.head = (self.head + 1) % MAX_RECORDS
+            self.count -= 1
+            self.sent += 1
+        return True
+
+    async def send_records(self):
+        logging.add_sink(self.sink)
+        try:
+            while self.run:
+                await self.ready.wait()
+                self.ready.clear()
+                await asyncio.sleep(BATCH_DELAY)
+                while self.run and not self.flush():
+                    await asyncio.sleep(RETRY_INTERVAL)
+        finally:
+            logging.remove_sink(self.sink)
+
+    def status(self):
+        return {
+            'host': self.host,
+            'port': self.port,
+            'format': self.rfc,
+            'sent': self.sent,
+            'queued': self.count,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+    def stop(self):
+        self.run = False
+        self.ready.set()
+
+    def close(self):
+        logging.remove_sink(self.sink)
+        self.socket.close()
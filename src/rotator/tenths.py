@@ -0,0 +1,168 @@
+#
+# tenths.py -- bearings as integer tenths of degrees, and fast bytes codecs for them.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+# Bearings are plain ints counting tenths of a degree: 66.5 degrees is 665.  Negative values are
+# reserved for the Rotator error codes.  The RP2040 has no FPU, so bearings never go through float.
+
+from utils import micropython, upython
+
+if not upython:
+    def const(i):
+        return i
+
+TENTHS_PER_DEGREE = const(10)
+FULL_CIRCLE = const(3600)
+_DOT = const(0x2e)  # '.'
+_MINUS = const(0x2d)  # '-'
+_ZERO = const(0x30)  # '0'
+_NINE = const(0x39)  # '9'
+
+
+def from_degrees(degrees: int) -> int:
+    return degrees * TENTHS_PER_DEGREE
+
+
+def to_degrees(tenths: int) -> int:
+    """
+    round to whole degrees.  negative error codes are passed through unchanged.
+    """
+    return (tenths + 5) // TENTHS_PER_DEGREE if tenths >= 0 else tenths
+
+
+def to_decimal_degrees(tenths: int):
+    """
+    tenths as float degrees for JSON status.  negative error codes are passed through unchanged.
+    """
+    return tenths / TENTHS_PER_DEGREE if tenths >= 0 else tenths
+
+
+def angle_difference(a: int, b: int) -> int:
+    """
+    :return: signed shortest angle from b to a, so overlap positions past 360 compare correctly
+    """
+    return (a - b + FULL_CIRCLE + FULL_CIRCLE // 2) % FULL_CIRCLE - FULL_CIRCLE // 2
+
+
+@micropython.native
+def parse_tenths(buf, start: int = 0, end: int = -1):
+    """
+    parse a decimal number like '66', '-12.5' or '359.95' in buf[start:end] to integer tenths,
+    truncating extra digits, without going through float.
+    :param buf: bytes, bytearray or memoryview
+    :param start: index of the first character
+    :param end: index after the last character, -1 for the end of buf
+    :return: tenths, or None if it is not a number
+    """
+    if end < 0:
+        end = len(buf)
+    if end <= start:
+        return None
+    negative = buf[start] == _MINUS
+    if negative:
+        start += 1
+    value = 0
+    digits = 0
+    fraction_digits = 0
+    tenths = 0
+    seen_dot = False
+    for i in range(start, end):
+        b = buf[i]
+        if b == _DOT:
+            if seen_dot:
+                return None
+            seen_dot = True
+        elif _ZERO <= b <= _NINE:
+            if not seen_dot:
+                value = value * 10 + b - _ZERO
+                digits += 1
+            else:
+                if fraction_digits == 0:
+                    tenths = b - _ZERO
+                fraction_digits += 1
+        else:
+            return None
+    if digits == 0 and fraction_digits == 0:  # '.', '-' or '-.'
+        return None
+    value = value * 10 + tenths
+    return -value if negative else value
+
+
+@micropython.native
+def digits_end(buf, start: int, end: int) -> int:
+    """
+    :return: the index of the first byte in buf[start:end] that is not a digit, or end
+    """
+    while start < end and _ZERO <= buf[start] <= _NINE:
+        start += 1
+    return start
+
+
+@micropython.native
+def write_digits(buf, offset: int, value: int, width: int) -> int:
+    """
+    write a non-negative int into buf at offset as exactly width zero-padded digits,
+    for commands built in place in a preallocated buffer.
+    :return: the index after the last digit written
+    """
+    i = offset + width
+    while i > offset:
+        i -= 1
+        buf[i] = _ZERO + value % 10
+        value //= 10
+    return offset + width
+
+
+def write_degrees(buf, offset: int, tenths: int, width: int = 3) -> int:
+    """
+    write a bearing rounded to whole degrees, the way the DCU-1 protocol wants it: 66.5 -> b'067'.
+    :return: the index after the last digit written
+    """
+    return write_digits(buf, offset, (tenths + 5) // TENTHS_PER_DEGREE, width)
+
+
+def format_tenths(tenths: int, fixed: bool = False) -> bytes:
+    """
+    format tenths as decimal degrees.
+    :param tenths: the bearing
+    :param fixed: always show the tenths digit. otherwise whole degrees are shown as an integer,
+                  so that clients expecting integer degrees keep working.
+    :return: bytes like b'66', b'66.5' or b'-13'
+    """
+    if tenths < 0:
+        return b'-' + format_tenths(-tenths, fixed)
+    fraction = tenths % TENTHS_PER_DEGREE
+    if fraction or fixed:
+        return b'%d.%d' % (tenths // TENTHS_PER_DEGREE, fraction)
+    return b'%d' % (tenths // TENTHS_PER_DEGREE)
+
+
+def format_bearing(bearing: int) -> bytes:
+    """
+    format a bearing like format_tenths, but pass negative Rotator error codes through as integers.
+    :return: bytes like b'66.5' or b'-13'
+    """
+    return format_tenths(bearing) if bearing >= 0 else b'%d' % bearing
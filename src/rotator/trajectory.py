@@ -0,0 +1,203 @@
+#
+# trajectory.py -- run an uploaded list of time-tagged azimuths.
+#
+
+__author__ = 'J. B. Otterson'
+__copyright__ = """
+Copyright 2026, J. B. Otterson N1KDO.
+Redistribution and use in source and binary forms, with or without modification,
+are permitted provided that the following conditions are met:
+  1. Redistributions of source code must retain the above copyright notice,
+     this list of conditions and the following disclaimer.
+  2. Redistributions in binary form must reproduce the above copyright notice,
+     this list of conditions and the following disclaimer in the documentation
+     and/or other materials provided with the distribution.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+__version__ = '0.1.0'  # 2026-10-19
+
+import asyncio
+from array import array
+
+import micro_logging as logging
+from dcu1_rotator import travel_time
+from loop_monitor import set_activity
+from tenths import FULL_CIRCLE, TENTHS_PER_DEGREE, angle_difference, digits_end, parse_tenths
+from utils import unix_time
+
+MAX_POINTS = 512
+STEP_INTERVAL = 1  # seconds between scheduler steps
+DEADBAND = TENTHS_PER_DEGREE  # the controller only takes whole degrees, smaller changes are not sent.
+COMMAND_LATENCY = 1  # seconds from set_rotator_bearing until the rotator starts to turn
+NO_ERROR = -1
+
+
+class Trajectory:
+    """
+    runs a list of (UTC time, azimuth) points, so a tracking program can upload a whole pass at once
+    instead of sending a bearing every few seconds over a Wi-Fi link that might drop out.
+
+    the points live in preallocated arrays.  between points the azimuth is interpolated, and the
+    rotator is aimed ahead by the time it takes to get there.  when each point's time passes, the
+    pointing error is recorded for the report.
+    """
+
+    def __init__(self):
+        self.times = None  # UTC seconds since 1970
+        self.azimuths = None  # tenths of degrees
+        self.errors = None  # tenths of degrees, NO_ERROR until the point's time has passed
+        self.count = 0
+        self.next_point = 0
+        self.last_command = -1
+        self.commands = 0
+        self.rotator = None
+        self.state = 'empty'
+        self.task = None
+
+    def _allocate(self):
+        if self.times is None:
+            self.times = array('l', [0] * MAX_POINTS)
+            self.azimuths = array('h', [0] * MAX_POINTS)
+            self.errors = array('h', [0] * MAX_POINTS)
+
+    def clear(self):
+        self.stop()
+        self.count = 0
+        self.state = 'empty'
+
+    def add_point(self, utc, azimuth):
+        """
+        append a point.  points must be in time order.
+        :param utc: UTC seconds since 1970
+        :param azimuth: tenths of degrees
+        :return: False if the point is rejected
+        """
+        self._allocate()
+        if self.count >= MAX_POINTS or not 0 <= azimuth <= FULL_CIRCLE:
+            return False
+        if self.count > 0 and utc <= self.times[self.count - 1]:
+            return False
+        self.times[self.count] = utc
+        self.azimuths[self.count] = azimuth
+        self.errors[self.count] = NO_ERROR
+        self.count += 1
+        return True
+
+    def parse_line(self, line):
+        """
+        add a point from a text line like b'1760900000 123.4' or b'1760900000,123.4'.
+        blank lines and lines starting with '#' are skipped.
+        :return: False if the line is not a valid point
+        """
+        end = len(line)
+        while end > 0 and line[end - 1] in (0x0a, 0x0d, 0x20):
+            end -= 1
+        if end == 0 or line[0] == 0x23:  # '#'
+            return True
+        time_end = digits_end(line, 0, end)
+        if time_end == 0 or time_end >= end or line[time_end] not in (0x20, 0x2c, 0x09):  # ' ' ',' tab
+            return False
+        azimuth = parse_tenths(line, time_end + 1, end)
+        if azimuth is None:
+            return False
+        return self.add_point(int(line[:time_end]), azimuth)
+
+    def azimuth_at(self, utc):
+        """
+        :return: the interpolated azimuth at utc, tenths of degrees
+        """
+        times = self.times
+        azimuths = self.azimuths
+        last = self.count - 1
+        if utc <= times[0]:
+            return azimuths[0]
+        if utc >= times[last]:
+            return azimuths[last]
+        i = self.next_point - 1 if self.next_point > 0 else 0
+        while i < last and times[i + 1] <= utc:
+            i += 1
+        span = times[i + 1] - times[i]
+        change = angle_difference(azimuths[i + 1], azimuths[i])
+        return (azimuths[i] + change * (utc - times[i]) // span) % FULL_CIRCLE
+
+    def start(self, r):
+        self.stop()
+        if self.count == 0:
+            return False
+        self.rotator = r
+        self.next_point = 0
+        self.last_command = -1
+        self.commands = 0
+        self.state = 'waiting'
+        self.task = asyncio.create_task(self.run())
+        logging.info('running %d point trajectory with rotor "%s"', 'trajectory:start', self.count, r.name)
+        return True
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+            self.state = 'stopped'
+            logging.info('trajectory stopped', 'trajectory:stop')
+
+    async def step(self, now):
+        r = self.rotator
+        bearing = await r.get_cached_bearing()
+        if bearing < 0:
+            return
+        set_activity('trajectory:step')
+        # record the error of every point whose time has come.
+        while self.next_point < self.count and self.times[self.next_point] <= now:
+            self.errors[self.next_point] = abs(angle_difference(bearing, self.azimuths[self.next_point]))
+            self.next_point += 1
+        # aim where the target will be once the rotator gets there.
+        target = r.plan_bearing(self.azimuth_at(now))
+        lead = int(travel_time(bearing, target)) + COMMAND_LATENCY
+        target = r.plan_bearing(self.azimuth_at(now + lead))
+        if self.last_command < 0 or abs(target - self.last_command) >= DEADBAND:
+            await r.set_rotator_bearing(target)
+            self.last_command = target
+            self.commands += 1
+
+    async def run(self):
+        try:
+            while self.next_point < self.count:
+                now = unix_time()
+                self.state = 'running' if now >= self.times[0] else 'waiting'
+                await self.step(now)
+                await asyncio.sleep(STEP_INTERVAL)
+            self.state = 'done'
+            logging.info('trajectory done, %d commands, max error %s', 'trajectory:run', self.commands,
+                         self.max_error() / 10)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.task = None
+
+    def max_error(self):
+        result = 0
+        for i in range(self.next_point):
+            if self.errors[i] > result:
+                result = self.errors[i]
+        return result
+
+    def status(self):
+        return {
+            'state': self.state,
+            'rotor': self.rotator.name if self.rotator is not None else None,
+            'points': self.count,
+            'completed': self.next_point,
+            'commands': self.commands,
+            'max_error': self.max_error() / 10,
+            # one row per completed point: UTC time, azimuth, error
+            'errors': [[self.times[i], self.azimuths[i] / 10, self.errors[i] / 10] for i in range(self.next_point)],
+        }
@@ -26,6 +26,7 @@ __version__ = '0.9.4'  # 2025-12-29
 
 import sys
 import time
+from array import array
 
 BITS = bytes([0, 1, 1, 2, 1, 2, 2, 3, 1, 2, 2, 3, 2, 3, 3, 4])
 
@@ -44,11 +45,58 @@ else:
     micropython = _MP()
 
 
+# log lines come in bursts within the same second, so the formatted second is kept until it changes.
+_timestamp_secs = -1
+_timestamp_base = ''  # 'YYYY-MM-DD HH:MM:SS'
+_timestamp = ''
+# the millisecond clock is lined up with the RTC seconds each time the second changes.
+_ms_anchor_secs = 0
+_ms_anchor_ms = 0
+_ms_anchor_ticks = 0
+
+
+def _update_timestamp():
+    global _timestamp_secs, _timestamp_base, _timestamp
+    secs = time.time()
+    if not upython:
+        secs = int(secs)
+    if secs != _timestamp_secs:
+        tt = time.gmtime(secs)
+        _timestamp_base = f'{tt[0]:04d}-{tt[1]:02d}-{tt[2]:02d} {tt[3]:02d}:{tt[4]:02d}:{tt[5]:02d}'
+        _timestamp = _timestamp_base + 'Z'
+        _timestamp_secs = secs
+    return secs
+
+
 @micropython.native
 def get_timestamp(tt=None):
-    if tt is None:
-        tt = time.gmtime()
-    return f'{tt[0]:04d}-{tt[1]:02d}-{tt[2]:02d} {tt[3]:02d}:{tt[4]:02d}:{tt[5]:02d}Z'
+    if tt is not None:
+        return f'{tt[0]:04d}-{tt[1]:02d}-{tt[2]:02d} {tt[3]:02d}:{tt[4]:02d}:{tt[5]:02d}Z'
+    _update_timestamp()
+    return _timestamp
+
+
+def get_timestamp_ms():
+    """
+    get the current time with milliseconds, like '2026-10-19 12:34:56.789Z'.
+    the RTC only counts seconds, so the milliseconds come from ticks_ms, counted from the earliest
+    moment the current second was seen.  they are close when something is logged every second or so.
+    """
+    global _ms_anchor_secs, _ms_anchor_ms, _ms_anchor_ticks
+    secs = _update_timestamp()
+    now = milliseconds()
+    ms = _ms_anchor_ms + milliseconds_diff(now, _ms_anchor_ticks)
+    est_secs = _ms_anchor_secs + ms // 1000
+    ms %= 1000
+    if est_secs != secs:
+        # the tick estimate disagrees with the RTC, move it to the nearest edge of the RTC second.
+        ms = 0 if est_secs < secs else 999
+    if secs != _ms_anchor_secs or est_secs != secs:
+        # re-anchor every second so the tick difference never gets near the ticks_ms wrap.
+        _ms_anchor_secs = secs
+        _ms_anchor_ms = ms
+        _ms_anchor_ticks = now
+    return f'{_timestamp_base}.{ms:03d}Z'
 
 
 @micropython.native
@@ -61,6 +109,45 @@ def milliseconds():
     return time.ticks_ms() if upython else int(time.time() * 1000)
 
 
+# uptime is added up from ticks_ms differences, in seconds and milliseconds so it stays a small int.
+# it must be read more often than every few days or ticks_ms will have wrapped.
+_uptime_secs = 0
+_uptime_ms = 0
+_uptime_ticks = milliseconds()
+
+
+def uptime_seconds() -> int:
+    global _uptime_secs, _uptime_ms, _uptime_ticks
+    now = milliseconds()
+    ms = _uptime_ms + milliseconds_diff(now, _uptime_ticks)
+    _uptime_ticks = now
+    _uptime_secs += ms // 1000
+    _uptime_ms = ms % 1000
+    return _uptime_secs
+
+
+def microseconds():
+    return time.ticks_us() if upython else int(time.perf_counter() * 1000000)
+
+
+def microseconds_diff(end, start):
+    return time.ticks_diff(end, start) if upython else end - start
+
+
+# seconds from 1970 to the time.time() epoch, some MicroPython ports count from 2000.
+_UNIX_EPOCH_OFFSET = 0 if time.gmtime(0)[0] == 1970 else 946684800
+
+
+def unix_time() -> int:
+    # UTC seconds since 1970 on every port.
+    return int(time.time()) + _UNIX_EPOCH_OFFSET
+
+
+def milliseconds_diff(end, start):
+    # ticks_ms wraps on micropython, so differences must use ticks_diff.
+    return time.ticks_diff(end, start) if upython else end - start
+
+
 @micropython.native
 def safe_int(value, default:int=-1) -> int:
     if value is None:
@@ -83,3 +170,119 @@ def num_bits_set(n: int) -> int:
         nn >>= 4
     return set_bits
 
+
+# @profiled and @profiled_async count calls and time into a fixed table, one slot per decorated function.
+# they decide when a module is imported, so main calls set_profiling() before importing the profiled modules,
+# and a change to the 'profile' configuration item needs a restart.
+# when profiling is off they return the function itself and cost nothing.
+PROFILE_SLOTS = 48
+
+profiling = False
+_profile_names = []
+# seconds and microseconds are kept apart so the sums stay small ints and never allocate.
+_profile_calls = array('l', (0 for _ in range(PROFILE_SLOTS)))
+_profile_secs = array('l', (0 for _ in range(PROFILE_SLOTS)))
+_profile_us = array('l', (0 for _ in range(PROFILE_SLOTS)))
+_profile_max_us = array('l', (0 for _ in range(PROFILE_SLOTS)))
+
+
+def set_profiling(enabled):
+    global profiling
+    profiling = enabled is True
+
+
+def _profile_slot(name):
+    if name in _profile_names:
+        return _profile_names.index(name)
+    if len(_profile_names) >= PROFILE_SLOTS:
+        return -1
+    _profile_names.append(name)
+    return len(_profile_names) - 1
+
+
+def _profile_add(slot, elapsed):
+    _profile_calls[slot] += 1
+    us = _profile_us[slot] + elapsed
+    if us >= 1000000:
+        _profile_secs[slot] += us // 1000000
+        us %= 1000000
+    _profile_us[slot] = us
+    if elapsed > _profile_max_us[slot]:
+        _profile_max_us[slot] = elapsed
+
+
+def _profile_decorator(name, make_wrapper):
+    def decorator(func):
+        if not profiling:
+            return func
+        slot = _profile_slot(name or func.__name__)
+        if slot < 0:  # table is full
+            return func
+        return make_wrapper(func, slot)
+    return decorator
+
+
+def _sync_wrapper(func, slot):
+    def wrapper(*args, **kwargs):
+        t0 = microseconds()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _profile_add(slot, microseconds_diff(microseconds(), t0))
+    return wrapper
+
+
+def _async_wrapper(func, slot):
+    async def wrapper(*args, **kwargs):
+        t0 = microseconds()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _profile_add(slot, microseconds_diff(microseconds(), t0))
+    return wrapper
+
+
+def profiled(name=None):
+    """
+    count calls to a function and the time spent in it.  use as @profiled or @profiled('module:function').
+    """
+    if callable(name):
+        return _profile_decorator(None, _sync_wrapper)(name)
+    return _profile_decorator(name, _sync_wrapper)
+
+
+def profiled_async(name=None):
+    """
+    like profiled, for coroutines.  the time includes any time the coroutine spent waiting.
+    """
+    if callable(name):
+        return _profile_decorator(None, _async_wrapper)(name)
+    return _profile_decorator(name, _async_wrapper)
+
+
+def profile_report() -> list:
+    """
+    :return: a dict per profiled function that has been called, the most total time first
+    """
+    report = []
+    for slot in range(len(_profile_names)):
+        calls = _profile_calls[slot]
+        if calls:
+            total_us = _profile_secs[slot] * 1000000 + _profile_us[slot]
+            report.append({
+                'name': _profile_names[slot],
+                'calls': calls,
+                'total_us': total_us,
+                'mean_us': total_us // calls,
+                'max_us': _profile_max_us[slot],
+            })
+    report.sort(key=lambda item: item['total_us'], reverse=True)
+    return report
+
+
+def profile_reset():
+    for slot in range(PROFILE_SLOTS):
+        _profile_calls[slot] = 0
+        _profile_secs[slot] = 0
+        _profile_us[slot] = 0
+        _profile_max_us[slot] = 0
@@ -0,0 +1,31 @@
+#
+# syslog_listener.py -- print syslog datagrams from the rotator controller-controller.
+#
+# python syslog_listener.py [port]
+# then set the controller's syslog configuration item to this computer's address and port.
+#
+import socket
+import sys
+
+SYSLOG_BUF_SIZE = 2048
+DEFAULT_PORT = 5514  # 514 needs root on most systems.
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    receive_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receive_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    receive_socket.bind(('', port))
+    print(f'listening for syslog on port {port}')
+    try:
+        while True:
+            udp_data, address = receive_socket.recvfrom(SYSLOG_BUF_SIZE)
+            print(address[0], udp_data.decode('utf-8', 'replace'))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receive_socket.close()
+
+
+if __name__ == '__main__':
+    main()